@@ -0,0 +1,64 @@
+"""
+Micro-benchmarks for the book API hot paths.
+
+Run from the project root with the same environment as the web container, e.g.::
+
+    $ docker-compose exec web python -m benchmarks.serialisers
+"""
+import os
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wookie.settings')
+django.setup()
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def make_books(n):
+    """
+    Build `n` unsaved books and the matching `values_for_serializer()` rows, without a database.
+    """
+    from wookie.apps.book.models import Book
+
+    now = datetime(2022, 12, 1, tzinfo=timezone.utc)
+    books, rows = [], []
+    for i in range(1, n + 1):
+        row = {
+            'id': i,
+            'title': f'Book {i}',
+            'author_pseudonym': f'author {i % 100}',
+            'description': f'Description of book {i} & its <adventures>',
+            'cover_image': f'images/book-covers/cover-{i}.webp' if i % 3 else '',
+            'cover_thumbnails': {'128': f'images/book-covers/cover-{i}-128.webp'} if i % 3 else {},
+            'price': Decimal(i % 10_000).scaleb(-2),
+            'published': bool(i % 2),
+            'created_at': now,
+            'updated_at': now,
+        }
+        book = Book(**{k: v for k, v in row.items() if k != 'author_pseudonym'})
+        book.author_pseudonym = row['author_pseudonym']
+        books.append(book)
+        rows.append(row)
+    return books, rows
+
+
+def best_of(func, repeat=3):
+    """
+    Return the fastest of `repeat` runs of `func()` in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(title, results):
+    print(title)
+    for name, n, seconds in results:
+        print(f'  {name:<28} {n:>8} books  {seconds * 1000:>10.1f} ms  {n / seconds:>12,.0f} books/s')
@@ -0,0 +1,95 @@
+"""
+Throughput and latency of a running server as the number of concurrent clients grows, with
+the resident memory of its worker processes, to compare the WSGI and ASGI entry points at
+the same number of workers::
+
+    $ gunicorn wookie.wsgi:application --workers=2 --bind 0.0.0.0:8000
+    $ python -m benchmarks.concurrency 'http://localhost:8000/v1/book/?page_size=50' --pids "$(pgrep -d, gunicorn)"
+
+    $ gunicorn wookie.asgi:application --workers=2 --worker-class=uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000
+    $ python -m benchmarks.concurrency 'http://localhost:8000/v1/book/?page_size=50' --pids "$(pgrep -d, gunicorn)"
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def get_rss(pids):
+    """
+    Total resident memory of `pids` in MiB, read from /proc (Linux only).
+    """
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        except (OSError, StopIteration):
+            pass
+    return total / 1024
+
+
+def client(url, headers, deadline, latencies, errors):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(exc)
+            connection.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def run(url, concurrency, duration, headers):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client, args=(url, headers, deadline, latencies, errors))
+               for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('::')[0], formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('url')
+    parser.add_argument('--concurrency', default='1,8,32,128', help='comma separated numbers of clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per concurrency level')
+    parser.add_argument('--header', action='append', default=[],
+                        help='extra request header, e.g. "Authorization: Bearer ..."')
+    parser.add_argument('--pids', default='', help='comma separated server pids to report the memory of')
+    args = parser.parse_args()
+
+    headers = dict(header.split(': ', 1) for header in args.header)
+    pids = [int(pid) for pid in args.pids.split(',') if pid]
+    print(f'{args.url}')
+    print(f'  {"clients":>8} {"req/s":>10} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>7} {"RSS MiB":>9}')
+    for concurrency in (int(n) for n in args.concurrency.split(',')):
+        latencies, errors = run(args.url, concurrency, args.duration, headers)
+        print(f'  {concurrency:>8} {len(latencies) / args.duration:>10,.0f} '
+              f'{percentile(latencies, 50) * 1000:>9.1f} {percentile(latencies, 95) * 1000:>9.1f} '
+              f'{percentile(latencies, 99) * 1000:>9.1f} {len(errors):>7} {get_rss(pids):>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Bulk import throughput: rows validated by `BookSerializer` and inserted with `bulk_create`.
+Every run is rolled back, so this is safe to run against a populated database.
+"""
+import json
+
+from benchmarks import SIZES, best_of, report
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from wookie.apps.book.bulk import import_books
+from wookie.parsers import JSONLinesParser
+
+
+class Rollback(Exception):
+    pass
+
+
+def run_import(body, author):
+    try:
+        with transaction.atomic():
+            rows = JSONLinesParser().parse(iter(body.splitlines(keepends=True)))
+            books, errors = import_books(rows, author)
+            assert books and not errors
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def main():
+    author, _ = get_user_model().objects.get_or_create(username='benchmark', defaults={'pseudonym': 'benchmark'})
+    results = []
+    for n in SIZES[:2]:
+        body = b''.join(json.dumps({'title': f'Book {i}', 'description': f'Description of book {i}',
+                                    'price': f'{i % 10_000 / 100:.2f}', 'published': bool(i % 2)}).encode() + b'\n'
+                        for i in range(n))
+        results.append(('import_books (JSON lines)', n, best_of(lambda: run_import(body, author))))
+    report('Importing books', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Throughput, tail latency and queries per request of the v1 book endpoints, driven over HTTP
+against a running server with the data of `benchmarks.seed`::
+
+    $ python -m benchmarks.seed --authors 100 --books 100000
+    $ DJANGO_QUERY_COUNT_HEADER=True gunicorn wookie.asgi:application --workers=2 \\
+          --worker-class=uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000
+    $ python -m benchmarks.load http://localhost:8000 --output before.json
+    ... change something, restart the server ...
+    $ python -m benchmarks.load http://localhost:8000 --output after.json --compare before.json
+
+Every scenario runs for `--duration` seconds with `--concurrency` clients; the authenticated
+ones log in as random seeded authors. Queries per request are read from the `X-Query-Count`
+header, only sent when the server runs with DJANGO_QUERY_COUNT_HEADER=True.
+"""
+import argparse
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.concurrency import percentile
+from benchmarks.seed import WORDS, get_authors
+
+from wookie.apps.book.models import Book
+
+
+class Scenario:
+    """
+    Builds the requests of one scenario: `(method, path, body or None)` tuples.
+    """
+    authenticated = False
+
+    def __init__(self, authors):
+        self.authors = authors
+
+    def get_request(self, rng, author):
+        raise NotImplementedError('`get_request()` must be implemented.')
+
+
+class ListScenario(Scenario):
+    name = 'list'
+
+    def get_request(self, rng, author):
+        params = {'page_size': 50}
+        if rng.random() < 0.5:
+            params['min_price'] = rng.choice((5, 10, 25))
+        if rng.random() < 0.3:
+            params['title'] = rng.choice(WORDS)
+        return 'GET', f'/v1/book/?{urlencode(params)}', None
+
+
+class SearchScenario(Scenario):
+    name = 'search'
+
+    def get_request(self, rng, author):
+        return 'GET', f'/v1/book/?{urlencode({"q": rng.choice(WORDS), "page_size": 20})}', None
+
+
+class MyListScenario(Scenario):
+    name = 'mylist'
+    authenticated = True
+
+    def get_request(self, rng, author):
+        return 'GET', '/v1/book/mylist/', None
+
+
+class DetailScenario(Scenario):
+    name = 'detail'
+    authenticated = True
+
+    def __init__(self, authors):
+        super().__init__(authors)
+        self.book_ids = {}
+        for author_id, book_id in Book.objects.filter(author__in=authors).values_list('author_id', 'id').iterator():
+            self.book_ids.setdefault(author_id, []).append(book_id)
+
+    def get_request(self, rng, author):
+        return 'GET', f'/v1/book/detail/{rng.choice(self.book_ids[author.pk])}/', None
+
+
+class CreateScenario(Scenario):
+    name = 'create'
+    authenticated = True
+
+    def get_request(self, rng, author):
+        body = urlencode({'title': f'Load test {rng.choice(WORDS)}', 'description': ' '.join(rng.sample(WORDS, 10)),
+                          'price': f'{rng.randint(100, 10_000) / 100:.2f}', 'published': 'true'})
+        return 'POST', '/v1/book/create/', body
+
+
+SCENARIOS = {scenario.name: scenario for scenario in
+             (ListScenario, SearchScenario, MyListScenario, DetailScenario, CreateScenario)}
+
+
+def get_token(base_url, username, password):
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    connection.request('POST', '/api/token/', body=urlencode({'username': username, 'password': password}),
+                       headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    if response.status != 200:
+        raise SystemExit(f'Logging in as {username} failed with {response.status}: {data[:200]!r}')
+    return json.loads(data)['access']
+
+
+def client(base_url, scenario, tokens, seed, deadline, results):
+    parts = urlsplit(base_url)
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    while time.perf_counter() < deadline:
+        author = rng.choice(scenario.authors)
+        method, path, body = scenario.get_request(rng, author)
+        headers = {'Accept': 'application/json'}
+        if scenario.authenticated:
+            headers['Authorization'] = f'Bearer {tokens[author.pk]}'
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            results['errors'].append(repr(exc))
+            connection.close()
+            continue
+        if response.status >= 400:
+            results['errors'].append(response.status)
+            continue
+        results['latencies'].append(time.perf_counter() - start)
+        if (queries := response.getheader('X-Query-Count')) is not None:
+            results['queries'].append(int(queries))
+    connection.close()
+
+
+def run(base_url, scenario, tokens, concurrency, duration, seed):
+    results = {'latencies': [], 'queries': [], 'errors': []}
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client, args=(base_url, scenario, tokens, seed + i, deadline, results))
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies, queries = results['latencies'], results['queries']
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'queries_per_request': sum(queries) / len(queries) if queries else None,
+        'errors': len(results['errors']),
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    print(f'{report["url"]} at {report["commit"] or "unknown commit"}, {report["concurrency"]} clients')
+    print(f'  {"scenario":<10} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"queries":>8} {"errors":>7}')
+    for name, result in report['scenarios'].items():
+        queries = result['queries_per_request']
+        print(f'  {name:<10} {result["rps"]:>9,.0f} {result["p50_ms"]:>9.1f} {result["p95_ms"]:>9.1f} '
+              f'{result["p99_ms"]:>9.1f} {"-" if queries is None else f"{queries:.1f}":>8} {result["errors"]:>7}')
+        if baseline and (before := baseline['scenarios'].get(name)):
+            print(f'  {"":<10} {change(before["rps"], result["rps"]):>9} '
+                  f'{change(before["p50_ms"], result["p50_ms"]):>9} {change(before["p95_ms"], result["p95_ms"]):>9} '
+                  f'{change(before["p99_ms"], result["p99_ms"]):>9} '
+                  f'{change(before["queries_per_request"], queries):>8}')
+
+
+def change(before, after):
+    if not before or after is None:
+        return ''
+    return f'{(after - before) / before:+.0%}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('::')[0], formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('url', help='base url of the server, e.g. http://localhost:8000')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma separated scenarios to run')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per scenario')
+    parser.add_argument('--prefix', default='benchmark', help='username prefix of the seeded authors')
+    parser.add_argument('--password', default='benchmark')
+    parser.add_argument('--logins', type=int, default=20, help='number of seeded authors to log in as')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    parser.add_argument('--compare', help='JSON report of an earlier run to print the changes against')
+    args = parser.parse_args()
+
+    authors = list(get_authors(args.prefix).filter(book__isnull=False).distinct().order_by('id')[:args.logins])
+    if not authors:
+        raise SystemExit(f'No `{args.prefix}-*` authors with books, run `python -m benchmarks.seed` first.')
+    tokens = {author.pk: get_token(args.url, author.username, args.password) for author in authors}
+
+    report = {'url': args.url, 'commit': get_commit(), 'concurrency': args.concurrency, 'duration': args.duration,
+              'scenarios': {}}
+    for name in args.scenarios.split(','):
+        scenario = SCENARIOS[name](authors)
+        report['scenarios'][name] = run(args.url, scenario, tokens, args.concurrency, args.duration, args.seed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Renderers on BookSerializer output: rest_framework_xml's XMLRenderer vs FastXMLRenderer
+(checked to render identical documents), and JSON vs MessagePack encode time and payload size.
+"""
+from benchmarks import SIZES, best_of, make_books, report
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework_xml.renderers import XMLRenderer
+from wookie.apps.book.serialisers import BookSerializer
+from wookie.renderers import FastXMLRenderer, MessagePackRenderer
+
+
+def main():
+    results, sizes = [], []
+    for n in SIZES:
+        books, _ = make_books(n)
+        data = BookSerializer(books, many=True).data
+        assert XMLRenderer().render(data) == FastXMLRenderer().render(data)
+
+        results.append(('JSONRenderer', n, best_of(lambda: JSONRenderer().render(data))))
+        results.append(('XMLRenderer', n, best_of(lambda: XMLRenderer().render(data))))
+        results.append(('FastXMLRenderer', n, best_of(lambda: FastXMLRenderer().render(data))))
+        results.append(('MessagePackRenderer', n, best_of(lambda: MessagePackRenderer().render(data))))
+        sizes.append((n, len(JSONRenderer().render(data)), len(MessagePackRenderer().render(data))))
+    report('Rendering books', results)
+
+    print('Payload size')
+    for n, json_size, msgpack_size in sizes:
+        print(f'  {n:>8} books  JSON {json_size:>12,} B  MessagePack {msgpack_size:>12,} B  '
+              f'({msgpack_size / json_size:.0%})')
+
+
+if __name__ == '__main__':
+    main()
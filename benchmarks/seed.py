@@ -0,0 +1,82 @@
+"""
+Seed the database with benchmark authors and books, the same ones for the same arguments::
+
+    $ python -m benchmarks.seed --authors 100 --books 100000
+
+Authors are named `<prefix>-<n>` and share the `--password`, so `benchmarks.load` can log in
+as any of them. Existing benchmark authors and their books are replaced.
+"""
+import argparse
+import random
+
+from benchmarks import best_of
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from wookie.apps.book.bulk import batched, delete_books
+from wookie.apps.book.cache import bump_catalog_version
+from wookie.apps.book.models import Book
+from wookie.apps.book.search import chunked, get_search_backend
+from wookie.apps.book.stats import get_stats_row, update_author_stats
+
+WORDS = ('wookiee', 'kashyyyk', 'ewok', 'endor', 'python', 'django', 'adventure', 'forest', 'song', 'tales',
+         'journey', 'medicine', 'trade', 'starship', 'market', 'cookbook', 'history', 'poems', 'guide', 'war')
+
+USER_MODEL = get_user_model()
+
+
+def get_authors(prefix):
+    return USER_MODEL.objects.filter(username__startswith=f'{prefix}-')
+
+
+def make_text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+@transaction.atomic
+def seed(authors, books, prefix, password, seed_value, published_ratio):
+    rng = random.Random(seed_value)
+    existing = get_authors(prefix)
+    delete_books(Book.objects.filter(author__in=existing))
+    existing.delete()
+
+    # Hashing is slow on purpose; every author gets the same hash.
+    hashed = make_password(password)
+    created = USER_MODEL.objects.bulk_create([
+        USER_MODEL(username=f'{prefix}-{i}', pseudonym=f'{make_text(rng, 1)} {prefix} {i}', password=hashed)
+        for i in range(authors)
+    ])
+    # The books of an author are not contiguous, like on a real catalog.
+    rows = (Book(author_id=(author := rng.choice(created)).pk, author_pseudonym=author.pseudonym,
+                 title=make_text(rng, rng.randint(2, 6)), description=make_text(rng, rng.randint(10, 60)),
+                 price=rng.randint(100, 10_000) / 100, published=rng.random() < published_ratio)
+            for _ in range(books))
+    backend = get_search_backend()
+    batch_size = settings.BOOK_IMPORT_BATCH_SIZE
+    for batch in batched(rows, batch_size):
+        batch = Book.objects.bulk_create(batch)
+        for chunk in chunked([book.pk for book in batch], batch_size):
+            backend.index(Book.objects.filter(pk__in=chunk))
+        update_author_stats(added=[get_stats_row(book) for book in batch])
+    transaction.on_commit(bump_catalog_version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('::')[0], formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--authors', type=int, default=100)
+    parser.add_argument('--books', type=int, default=10_000)
+    parser.add_argument('--prefix', default='benchmark')
+    parser.add_argument('--password', default='benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='random seed; the same seed gives the same data')
+    parser.add_argument('--published', type=float, default=0.8, help='share of published books')
+    args = parser.parse_args()
+
+    seconds = best_of(lambda: seed(args.authors, args.books, args.prefix, args.password, args.seed, args.published),
+                      repeat=1)
+    print(f'Seeded {args.authors} authors and {args.books} books in {seconds:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
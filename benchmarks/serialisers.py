@@ -0,0 +1,24 @@
+"""
+BookSerializer vs the BookReadSerializer fast path, checked to render identical JSON.
+"""
+from benchmarks import SIZES, best_of, make_books, report
+
+from rest_framework.renderers import JSONRenderer
+from wookie.apps.book.serialisers import BookReadSerializer, BookSerializer
+
+
+def main():
+    results = []
+    for n in SIZES:
+        books, rows = make_books(n)
+        slow = BookSerializer(books, many=True).data
+        fast = BookReadSerializer(rows, many=True).data
+        assert JSONRenderer().render(slow) == JSONRenderer().render(fast)
+
+        results.append(('BookSerializer', n, best_of(lambda: BookSerializer(books, many=True).data)))
+        results.append(('BookReadSerializer', n, best_of(lambda: BookReadSerializer(rows, many=True).data)))
+    report('Serializing books', results)
+
+
+if __name__ == '__main__':
+    main()
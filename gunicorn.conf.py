@@ -0,0 +1,21 @@
+"""
+gunicorn hooks, read from the working directory on start.
+
+With PROMETHEUS_MULTIPROC_DIR set, the workers keep their metrics in files in that directory
+(see `wookie/metrics.py`).
+"""
+import os
+import shutil
+
+
+def on_starting(server):
+    # Files left by the workers of a previous run would be summed up with the new ones.
+    if path := os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AuthorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wookie.apps.author'
+
+    def ready(self):
+        from wookie.apps.author import signals  # noqa: F401
@@ -0,0 +1,72 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from wookie.utils import LRUCache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication` that remembers, per worker process, the tokens it has verified and
+    the users they resolved to.
+
+    A token's RS256 signature is checked once and its claims are reused until the token's
+    own `exp`. Users are kept for `JWT_USER_CACHE_TIMEOUT` seconds, as their field values so
+    every request gets an instance of its own. Saving or deleting an Author bumps its version
+    in the shared cache, checked on every hit, so all workers drop it on their next request.
+    """
+    tokens = LRUCache(settings.JWT_TOKEN_CACHE_SIZE)
+    users = LRUCache(settings.JWT_USER_CACHE_SIZE)
+
+    def get_validated_token(self, raw_token):
+        key = hashlib.sha256(raw_token).digest()
+        if (cached := self.tokens.get(key)) is not None:
+            validated_token, expires = cached
+            if time.time() < expires:
+                return validated_token
+            self.tokens.delete(key)
+
+        validated_token = super().get_validated_token(raw_token)
+        self.tokens.set(key, (validated_token, validated_token['exp']))
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        version = cache.get(self.get_version_key(user_id))
+        if (cached := self.users.get(user_id)) is not None:
+            db, values, cached_version, expires = cached
+            if cached_version == version and time.monotonic() < expires:
+                user = self.user_model.from_db(db, list(values), list(values.values()))
+                if not user.is_active:
+                    raise AuthenticationFailed('User is inactive', code='user_inactive')
+                return user
+            self.users.delete(user_id)
+
+        user = super().get_user(validated_token)
+        values = {field.attname: getattr(user, field.attname) for field in user._meta.concrete_fields}
+        self.users.set(user_id, (user._state.db, values, version, time.monotonic() + settings.JWT_USER_CACHE_TIMEOUT))
+        return user
+
+    @staticmethod
+    def get_version_key(user_id):
+        return f'author:auth-version:{user_id}'
+
+    @classmethod
+    def forget_user(cls, user):
+        """
+        Drop `user` here at once and, through the shared cache, from every other worker.
+        Meant to run once the change is committed too, so no worker caches the old row again.
+        """
+        user_id = getattr(user, api_settings.USER_ID_FIELD)
+        cls.users.delete(user_id)
+        # Entries cached before now expire within the timeout, and the key with them.
+        cache.set(cls.get_version_key(user_id), time.time_ns(), timeout=settings.JWT_USER_CACHE_TIMEOUT)
@@ -0,0 +1,16 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from wookie.apps.author.authentication import CachedJWTAuthentication
+from wookie.apps.author.models import Author
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def forget_cached_author(sender, instance, **kwargs):
+    # Again after the commit: another worker may have cached the old row in the meantime.
+    CachedJWTAuthentication.forget_user(instance)
+    transaction.on_commit(partial(CachedJWTAuthentication.forget_user, instance))
@@ -0,0 +1,84 @@
+import time
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from wookie.apps.author.authentication import CachedJWTAuthentication
+
+USER_MODEL = get_user_model()
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        CachedJWTAuthentication.tokens.clear()
+        CachedJWTAuthentication.users.clear()
+        cache.clear()
+        self.author = USER_MODEL.objects.create_user(username='hamid',
+                                                     pseudonym='h.samsami',
+                                                     email='hamidreza.samsami@gmail.com',
+                                                     password='hamid')
+        resp = self.client.post(reverse('token_obtain_pair'), data={'username': 'hamid', 'password': 'hamid'})
+        self.token = f'Bearer {resp.data["access"]}'
+        self.url = reverse('book-mylist')
+
+    def test_token_is_verified_once(self):
+        with mock.patch.object(JWTAuthentication, 'get_validated_token',
+                               wraps=JWTAuthentication().get_validated_token) as verify:
+            for _ in range(3):
+                self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(verify.call_count, 1)
+
+    def test_repeat_requests_skip_the_user_query(self):
+        self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        # Only the books query is left
+        with self.assertNumQueries(1):
+            resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_saving_the_author_evicts_the_cached_user(self):
+        self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        self.author.is_active = False
+        self.author.save()
+
+        resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_authors_changed_in_another_worker_are_loaded_again(self):
+        self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        # Another worker saves the author; this one's entry is only outdated by the shared version.
+        USER_MODEL.objects.filter(id=self.author.id).update(is_active=False)
+        with mock.patch.object(CachedJWTAuthentication.users, 'delete'):
+            CachedJWTAuthentication.forget_user(self.author)
+
+        resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_every_request_gets_its_own_user(self):
+        authentication = CachedJWTAuthentication()
+        token = authentication.get_validated_token(self.token.split()[1].encode())
+        first = authentication.get_user(token)
+        first.pseudonym = 'changed'
+
+        second = authentication.get_user(token)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.pseudonym, 'h.samsami')
+
+    def test_cached_token_is_verified_again_after_exp(self):
+        self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        with mock.patch.object(JWTAuthentication, 'get_validated_token',
+                               side_effect=InvalidToken('Token is invalid or expired')) as verify, \
+                mock.patch('wookie.apps.author.authentication.time.time', return_value=time.time() + 2 * 24 * 3600):
+            resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+
+        self.assertEqual(verify.call_count, 1)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(CachedJWTAuthentication.tokens.data), 0)
+
+    def test_invalid_token_is_not_cached(self):
+        resp = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(CachedJWTAuthentication.tokens.data), 0)
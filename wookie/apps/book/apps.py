@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BookConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wookie.apps.book'
+
+    def ready(self):
+        from wookie.apps.book import signals  # noqa: F401
@@ -0,0 +1,127 @@
+from collections.abc import Iterator
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from wookie.apps.book.cache import bump_catalog_version
+from wookie.apps.book.filters import BookFilter
+from wookie.apps.book.models import Book
+from wookie.apps.book.search import chunked, get_search_backend
+from wookie.apps.book.serialisers import BookSerializer
+from wookie.apps.book.stats import get_stats_row, update_author_stats
+
+# Columns read from every imported row; anything else (ids, exported cover urls...) is ignored,
+# so an export can be imported back as is.
+IMPORT_FIELDS = ('title', 'description', 'price', 'published')
+
+
+def import_books(rows, author):
+    """
+    Validate `rows` with `BookSerializer` batch by batch and insert them for `author` with
+    `bulk_create`, all in one transaction. Nothing is inserted when any row is invalid: the
+    returned errors are `{'row': <1-based row number>, 'errors': {...}}` dicts instead.
+
+    Returns `(created_books, errors)`.
+    """
+    batch_size = settings.BOOK_IMPORT_BATCH_SIZE
+    books, errors = [], []
+    for number, batch in enumerate(batched(rows, batch_size)):
+        if number * batch_size + len(batch) > settings.BOOK_IMPORT_MAX_ROWS:
+            raise ValidationError(f'An import can not have more than {settings.BOOK_IMPORT_MAX_ROWS} rows.')
+        serializer = BookSerializer(data=[get_import_row(row) for row in batch], many=True)
+        if serializer.is_valid():
+            if not errors:
+                books.extend(Book(author_id=author.pk, author_pseudonym=author.pseudonym, **data)
+                             for data in serializer.validated_data)
+            continue
+        books.clear()
+        errors.extend({'row': number * batch_size + i + 1, 'errors': row_errors}
+                      for i, row_errors in enumerate(serializer.errors) if row_errors)
+        if len(errors) >= settings.BOOK_IMPORT_MAX_ERRORS:
+            return [], errors[:settings.BOOK_IMPORT_MAX_ERRORS]
+    if errors:
+        return [], errors
+
+    with transaction.atomic():
+        books = Book.objects.bulk_create(books, batch_size=batch_size)
+        # `bulk_create` sends no signals, so the books are indexed here.
+        backend = get_search_backend()
+        for chunk in chunked([book.pk for book in books], batch_size):
+            backend.index(Book.objects.filter(pk__in=chunk))
+        update_author_stats(added=[get_stats_row(book) for book in books])
+        transaction.on_commit(bump_catalog_version)
+    return books, []
+
+
+def select_books(author, ids=None, filter=None):
+    """
+    The books of `author` a bulk action applies to: the listed `ids`, or those matching the
+    `BookFilter` parameters in `filter`. The filter is kept as a subquery, so the action
+    still runs as a single statement.
+    """
+    books = Book.objects.filter(author=author)
+    if ids is not None:
+        return books.filter(id__in=ids)
+    filterset = BookFilter(filter, queryset=books)
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return books.filter(id__in=filterset.qs.values('id'))
+
+
+def get_missing_ids(ids, found):
+    return sorted(set(ids) - set(found))
+
+
+def set_published(queryset, published):
+    """
+    Publish or unpublish the selected books with one `UPDATE`. Returns the number of books.
+    """
+    with transaction.atomic():
+        # Read, and locked, before the UPDATE: a filter may match the books on the very flag
+        # being changed, e.g. `author_pseudonym` only matches published ones.
+        changed = list(queryset.exclude(published=published).select_for_update()
+                       .values_list('author_id', 'published', 'price'))
+        updated = queryset.update(published=published, updated_at=timezone.now())
+        if updated:
+            update_author_stats(added=[(author_id, published, price) for author_id, _, price in changed],
+                                removed=changed)
+            transaction.on_commit(bump_catalog_version)
+    return updated
+
+
+def delete_books(queryset):
+    """
+    Delete the selected books with a single `DELETE`, the selection kept as a subquery, and
+    their bookkeeping done once for all of them (see `BookQuerySet.delete_rows()`). Returns
+    the deleted ids.
+    """
+    return [book.id for book in queryset.delete_rows()]
+
+
+def get_import_rows(data):
+    """
+    The rows of an import body: a list, the lazy iterator of a JSON lines or CSV upload, or a
+    single book as a dict. Anything else (a number, a string...) is rejected.
+    """
+    if isinstance(data, dict):
+        return [data] if data else []
+    if not isinstance(data, (list, Iterator)):
+        raise ValidationError('Send a list of books or a single book.')
+    return data
+
+
+def get_import_row(row):
+    if not isinstance(row, dict):
+        # Left for the serializer to reject with its usual message.
+        return row
+    # Empty CSV cells count as missing, so model defaults apply.
+    return {field: row[field] for field in IMPORT_FIELDS if row.get(field) not in (None, '')}
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
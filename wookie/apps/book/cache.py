@@ -0,0 +1,69 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = 'book:catalog-version'
+# Time until which the replicas may not have replayed the last write yet.
+CATALOG_SETTLED_AT_KEY = 'book:catalog-settled-at'
+
+
+def get_catalog_version():
+    """
+    The version the book list, facets and stats are cached under. It is marked unsettled
+    until every replica in use has surely replayed the last write, so what was cached from a
+    replica meanwhile is left behind once it settles.
+    """
+    values = cache.get_many([CATALOG_VERSION_KEY, CATALOG_SETTLED_AT_KEY])
+    version = values.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never goes backwards and
+        # revives pages cached under an older number.
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    if values.get(CATALOG_SETTLED_AT_KEY, 0) > time.time():
+        return f'{version}-unsettled'
+    return version
+
+
+def bump_catalog_version():
+    # Meant to run from transaction.on_commit: bumping before the write is visible would let
+    # a concurrent reader cache the old rows under the new version.
+    incr_catalog_version()
+    if settings.DATABASE_REPLICAS:
+        # A replica may not have replayed the write yet, so pages it serves can still be old.
+        delay = settings.DATABASE_REPLICA_MAX_LAG + settings.DATABASE_REPLICA_CHECK_INTERVAL
+        cache.set(CATALOG_SETTLED_AT_KEY, time.time() + delay, timeout=math.ceil(delay))
+
+
+def incr_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        get_catalog_version()
+
+
+def list_cache_key(request):
+    """
+    Key a book list response on the catalog version, the origin (cover image urls and
+    pagination links are absolute) and the normalized query parameters.
+    """
+    params = sorted((k, v) for k, values in request.query_params.lists() for v in values if v != '')
+    raw = '|'.join([request.build_absolute_uri('/'), repr(params)])
+    return f'book:list:{get_catalog_version()}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def facets_cache_key():
+    """
+    Key the facets of the whole book list on the catalog version.
+    """
+    return f'book:facets:{get_catalog_version()}'
+
+
+def stats_cache_key():
+    """
+    Key the catalog stats on the catalog version.
+    """
+    return f'book:stats:{get_catalog_version()}'
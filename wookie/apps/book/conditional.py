@@ -0,0 +1,59 @@
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def get_list_state(queryset):
+    """
+    The cheap aggregate that changes whenever a book list representation may change:
+    the newest `updated_at` and the number of rows.
+    """
+    state = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return state['last_modified'], state['count']
+
+
+async def aget_list_state(queryset):
+    state = await queryset.order_by().aaggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return state['last_modified'], state['count']
+
+
+def get_validators(request, last_modified, *parts):
+    """
+    Build a strong ETag and a Last-Modified timestamp for a representation. The negotiated
+    media type is part of the tag because JSON and XML bodies of the same rows differ.
+    """
+    raw = '|'.join(str(part) for part in (request.accepted_media_type, last_modified, *parts))
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    return etag, last_modified and timegm(last_modified.utctimetuple())
+
+
+def get_list_validators(request, last_modified, count):
+    """
+    Only an ETag for a book list. A delete or unpublish leaves the newest `updated_at` as it
+    is or moves it back, so a Last-Modified would keep answering `If-Modified-Since` with
+    304; the count in the tag changes with them.
+    """
+    etag, _ = get_validators(request, last_modified, count)
+    return etag, None
+
+
+def get_not_modified_response(request, validators):
+    """
+    Return a 304 (or 412) response when the client's conditional headers still match,
+    otherwise None.
+    """
+    response = get_conditional_response(request, *validators)
+    if response is not None:
+        set_validators(response, validators)
+    return response
+
+
+def set_validators(response, validators):
+    etag, last_modified = validators
+    response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    return response
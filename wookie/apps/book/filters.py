@@ -1,13 +1,20 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q
 from django_filters import rest_framework as filters
 from wookie.apps.book.models import Book
+from wookie.apps.book.search import get_search_backend
 
 
 class BookFilter(filters.FilterSet):
+    q = filters.CharFilter(method='search_filter', label='q')
     title = filters.CharFilter(field_name='title', lookup_expr='icontains')
     author_pseudonym = filters.CharFilter(method='pseudonym_filter', label='author_pseudonym')
     description = filters.CharFilter(field_name='description', lookup_expr='icontains')
     min_price = filters.NumberFilter(field_name="price", lookup_expr='gte')
     max_price = filters.NumberFilter(field_name="price", lookup_expr='lte')
+    facets = filters.BooleanFilter(method='facets_filter', label='facets')
 
     class Meta:
         model = Book
@@ -15,6 +22,66 @@ class BookFilter(filters.FilterSet):
 
     def pseudonym_filter(self, queryset, name, value):
         if name == 'author_pseudonym':
-            return queryset.prefetch_related('author').filter(published=True).filter(**{
-                'author__pseudonym__contains': value,
+            return queryset.filter(published=True).filter(**{
+                'author_pseudonym__contains': value,
             })
+
+    def search_filter(self, queryset, name, value):
+        return get_search_backend().search(queryset, value)
+
+    def facets_filter(self, queryset, name, value):
+        # Only asks the list for `facets` next to the results.
+        return queryset
+
+    @classmethod
+    def wants_facets(cls, params):
+        return bool(cls.base_filters['facets'].field.clean(params.get('facets')))
+
+    @classmethod
+    def is_filtering(cls, params):
+        return any(params.get(name) for name in cls.base_filters if name != 'facets')
+
+    @staticmethod
+    def get_price_ranges():
+        edges = [Decimal(edge) for edge in settings.BOOK_FACET_PRICE_EDGES]
+        return list(zip([None, *edges], [*edges, None]))
+
+    @classmethod
+    def get_facet_rows(cls, queryset):
+        """
+        One row per author pseudonym of the filtered books with their count per facet value,
+        all from a single GROUP BY pass; `get_facets()` adds them up.
+        """
+        counts = {'published_books': Count('id', filter=Q(published=True))}
+        for i, (low, high) in enumerate(cls.get_price_ranges()):
+            in_range = Q()
+            if low is not None:
+                in_range &= Q(price__gte=low)
+            if high is not None:
+                in_range &= Q(price__lt=high)
+            counts[f'price_{i}'] = Count('id', filter=in_range)
+        return queryset.order_by().values('author_pseudonym').annotate(books=Count('id'), **counts)
+
+    @classmethod
+    def get_facets(cls, rows):
+        """
+        Book counts per price range (`min` inclusive, `max` exclusive), for the
+        BOOK_FACET_AUTHORS most frequent author pseudonyms and per published flag.
+        """
+        rows = list(rows)
+        books = sum(row['books'] for row in rows)
+        published = sum(row['published_books'] for row in rows)
+        authors = sorted(rows, key=lambda row: (-row['books'], row['author_pseudonym']))
+        return {
+            'price': [{'min': format_price(low), 'max': format_price(high),
+                       'count': sum(row[f'price_{i}'] for row in rows)}
+                      for i, (low, high) in enumerate(cls.get_price_ranges())],
+            'author_pseudonym': [{'value': row['author_pseudonym'], 'count': row['books']}
+                                 for row in authors[:settings.BOOK_FACET_AUTHORS]],
+            'published': [{'value': value, 'count': count}
+                          for value, count in ((True, published), (False, books - published)) if count],
+        }
+
+
+def format_price(value):
+    return None if value is None else f'{value:.2f}'
@@ -0,0 +1,110 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from wookie.apps.book.cache import bump_catalog_version
+from wookie.apps.book.models import Book, CoverBlob
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=settings.BOOK_COVER_WORKERS, thread_name_prefix='book-cover')
+
+COVER_FORMAT = 'WEBP'
+COVER_EXTENSION = '.webp'
+
+
+def schedule_cover_processing(book_id):
+    """
+    Queue the uploaded cover of a book for processing on the worker pool. Call it from
+    `transaction.on_commit` so the worker sees the saved row.
+    """
+    return executor.submit(process_cover_safely, book_id)
+
+
+def get_unprocessed_covers(updated_before):
+    """
+    The books whose uploaded cover was never processed, e.g. because the process holding its
+    job exited: they still have a cover but no thumbnails.
+    """
+    return Book.objects.exclude(cover_image__isnull=True).exclude(cover_image='')\
+        .filter(cover_thumbnails={}, updated_at__lt=updated_before)
+
+
+def process_cover_safely(book_id):
+    try:
+        process_cover(book_id)
+    except Exception:
+        logger.exception('Processing the cover of book %s failed', book_id)
+    finally:
+        close_old_connections()
+
+
+def process_cover(book_id):
+    """
+    Verify the uploaded cover with Pillow, re-encode it to WebP without any metadata, render
+    the thumbnails and swap them in. An upload that is not a readable image is dropped.
+    """
+    book = Book.objects.only('id', 'cover_image', 'cover_thumbnails').filter(id=book_id).first()
+    if book is None or not book.cover_image:
+        return
+    original = book.cover_image.name
+    storage = book.cover_image.storage
+
+    try:
+        image = open_image(book.cover_image)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        logger.warning('Dropping the cover of book %s: %s is not a valid image', book_id, original)
+        with transaction.atomic():
+            if Book.objects.filter(id=book_id, cover_image=original)\
+                    .update(cover_image=None, cover_thumbnails={}, updated_at=timezone.now()):
+                CoverBlob.objects.release(book.cover_names)
+                transaction.on_commit(bump_catalog_version)
+        return
+
+    cover = encode_image(image)
+    thumbnails = {}
+    for size in settings.BOOK_COVER_THUMBNAIL_SIZES:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.Resampling.LANCZOS)
+        thumbnails[str(size)] = encode_image(thumbnail)
+
+    with transaction.atomic():
+        # Written in the transaction acquiring them. The storage names blobs after their
+        # content, only the extension of these names is used.
+        cover = storage.save(f'cover{COVER_EXTENSION}', cover)
+        thumbnails = {size: storage.save(f'cover-{size}{COVER_EXTENSION}', thumbnail)
+                      for size, thumbnail in thumbnails.items()}
+        variants = {cover, *thumbnails.values()}
+        CoverBlob.objects.acquire(variants)
+        # Only swap the variants in if the cover was not replaced while we were working.
+        if Book.objects.filter(id=book_id, cover_image=original)\
+                .update(cover_image=cover, cover_thumbnails=thumbnails, updated_at=timezone.now()):
+            CoverBlob.objects.release(book.cover_names)
+            transaction.on_commit(bump_catalog_version)
+        else:
+            CoverBlob.objects.release(variants)
+
+
+def open_image(file):
+    # `verify()` leaves the image unusable, so the file is opened a second time to decode it.
+    with file.open('rb') as f:
+        Image.open(f).verify()
+    with file.open('rb') as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+def encode_image(image):
+    # Nothing but the pixels is written: EXIF, XMP and ICC profiles are left behind.
+    buffer = BytesIO()
+    image.save(buffer, COVER_FORMAT, quality=settings.BOOK_COVER_QUALITY, method=4)
+    return ContentFile(buffer.getvalue())
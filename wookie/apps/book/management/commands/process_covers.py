@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from wookie.apps.book.images import get_unprocessed_covers, process_cover_safely
+
+
+class Command(BaseCommand):
+    help = ('Process the uploaded covers whose job was lost, e.g. to a worker restart: '
+            'books with a cover but no thumbnails.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=300,
+                            help='skip books written in the last MIN_AGE seconds, whose job may still be queued')
+
+    def handle(self, *args, min_age, **options):
+        updated_before = timezone.now() - timedelta(seconds=min_age)
+        book_ids = list(get_unprocessed_covers(updated_before).order_by('id').values_list('id', flat=True))
+        for book_id in book_ids:
+            process_cover_safely(book_id)
+        self.stdout.write(f'Processed the covers of {len(book_ids)} books')
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.3 on 2026-10-18 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0011_alter_book_published'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['published', '-created_at', '-id'], name='book_published_created_idx'),
+        ),
+    ]
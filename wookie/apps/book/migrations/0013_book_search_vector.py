@@ -0,0 +1,60 @@
+# Generated by Django 4.1.3 on 2026-10-18 10:35
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX book_search_vector_idx ON book_book USING gin (search_vector)',
+    'CREATE INDEX book_title_trgm_idx ON book_book USING gin (title gin_trgm_ops)',
+    'CREATE INDEX book_description_trgm_idx ON book_book USING gin (description gin_trgm_ops)',
+    'CREATE INDEX author_pseudonym_trgm_idx ON author_author USING gin (pseudonym gin_trgm_ops)',
+    "UPDATE book_book SET search_vector = "
+    "setweight(to_tsvector('english', book_book.title), 'A') || "
+    "setweight(to_tsvector('english', author_author.pseudonym), 'A') || "
+    "setweight(to_tsvector('english', book_book.description), 'B') "
+    "FROM author_author WHERE author_author.id = book_book.author_id",
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS author_pseudonym_trgm_idx',
+    'DROP INDEX IF EXISTS book_description_trgm_idx',
+    'DROP INDEX IF EXISTS book_title_trgm_idx',
+    'DROP INDEX IF EXISTS book_search_vector_idx',
+]
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE book_book_fts USING fts5("
+    "title, description, author_pseudonym, tokenize='unicode61 remove_diacritics 2')",
+    'INSERT INTO book_book_fts (rowid, title, description, author_pseudonym) '
+    'SELECT book_book.id, book_book.title, book_book.description, author_author.pseudonym '
+    'FROM book_book INNER JOIN author_author ON author_author.id = book_book.author_id',
+]
+SQLITE_BACKWARD = [
+    'DROP TABLE IF EXISTS book_book_fts',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0012_book_published_created_idx'),
+        ('author', '0003_alter_author_pseudonym'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
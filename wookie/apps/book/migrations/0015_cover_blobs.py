@@ -0,0 +1,44 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:01
+
+from collections import Counter
+
+import django.core.validators
+from django.db import migrations, models
+import wookie.apps.book.storage
+
+
+def count_references(apps, schema_editor):
+    # Covers uploaded so far keep their names; they are counted like content-addressed blobs
+    # so that they are deleted once no book points at them anymore.
+    Book = apps.get_model('book', 'Book')
+    CoverBlob = apps.get_model('book', 'CoverBlob')
+    references = Counter()
+    for cover_image, cover_thumbnails in Book.objects.values_list('cover_image', 'cover_thumbnails').iterator():
+        if cover_image:
+            references[cover_image] += 1
+        references.update(set(cover_thumbnails.values()) - {cover_image})
+    CoverBlob.objects.bulk_create([CoverBlob(name=name, references=count) for name, count in references.items()],
+                                  batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0014_book_cover_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoverBlob',
+            fields=[
+                ('name', models.CharField(max_length=500, primary_key=True, serialize=False)),
+                ('references', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='cover_image',
+            field=models.ImageField(blank=True, error_messages={'invalid_extension': '%(value)s'}, max_length=500, null=True, storage=wookie.apps.book.storage.get_cover_storage, upload_to='images/book-covers', validators=[django.core.validators.validate_image_file_extension], verbose_name='cover image'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:27
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# `author_pseudonym` filters are `LIKE '%...%'` lookups on the book row now; the trigram index
+# on the author table served them through the join.
+POSTGRES_FORWARD = [
+    'CREATE INDEX book_author_pseudonym_trgm_idx ON book_book USING gin (author_pseudonym gin_trgm_ops)',
+    'DROP INDEX IF EXISTS author_pseudonym_trgm_idx',
+]
+POSTGRES_BACKWARD = [
+    'CREATE INDEX author_pseudonym_trgm_idx ON author_author USING gin (pseudonym gin_trgm_ops)',
+    'DROP INDEX IF EXISTS book_author_pseudonym_trgm_idx',
+]
+
+
+def copy_pseudonyms(apps, schema_editor):
+    Author = apps.get_model('author', 'Author')
+    Book = apps.get_model('book', 'Book')
+    Book.objects.update(author_pseudonym=Subquery(Author.objects.filter(pk=OuterRef('author_id'))
+                                                  .values('pseudonym')[:1]))
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0015_cover_blobs'),
+        ('author', '0003_alter_author_pseudonym'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='author_pseudonym',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(copy_pseudonyms, migrations.RunPython.noop),
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD}),
+            run({'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
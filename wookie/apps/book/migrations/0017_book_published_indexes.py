@@ -0,0 +1,55 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+# Django runs `icontains` as `UPPER(column::text) LIKE UPPER(...)` on PostgreSQL, which the
+# trigram indexes on the bare columns do not serve; index that expression instead.
+POSTGRES_FORWARD = [
+    'CREATE INDEX book_title_upper_trgm_idx ON book_book USING gin (UPPER(title::text) gin_trgm_ops)',
+    'CREATE INDEX book_description_upper_trgm_idx ON book_book USING gin (UPPER(description::text) gin_trgm_ops)',
+    'DROP INDEX IF EXISTS book_title_trgm_idx',
+    'DROP INDEX IF EXISTS book_description_trgm_idx',
+]
+POSTGRES_BACKWARD = [
+    'CREATE INDEX book_title_trgm_idx ON book_book USING gin (title gin_trgm_ops)',
+    'CREATE INDEX book_description_trgm_idx ON book_book USING gin (description gin_trgm_ops)',
+    'DROP INDEX IF EXISTS book_description_upper_trgm_idx',
+    'DROP INDEX IF EXISTS book_title_upper_trgm_idx',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0016_book_author_pseudonym'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='book',
+            name='book_published_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('published', True)), fields=['-created_at', '-id'], name='book_published_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('published', True)), fields=['price', '-created_at', '-id'], name='book_published_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(condition=models.Q(('published', True)), fields=['updated_at'], name='book_published_updated_idx'),
+        ),
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD}),
+            run({'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
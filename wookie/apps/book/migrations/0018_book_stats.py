@@ -0,0 +1,42 @@
+# Generated by Django 4.1.3 on 2026-10-18 11:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+PUBLISHED = Q(published=True)
+AGGREGATES = {
+    'books': Count('id'),
+    'published_books': Count('id', filter=PUBLISHED),
+    'price_total': Sum('price', filter=PUBLISHED),
+}
+
+
+def compute_stats(apps, schema_editor):
+    Book = apps.get_model('book', 'Book')
+    AuthorStats = apps.get_model('book', 'AuthorStats')
+    rows = Book.objects.order_by().values('author_id').annotate(**AGGREGATES).iterator()
+    AuthorStats.objects.bulk_create([AuthorStats(**{**row, 'price_total': row['price_total'] or 0}) for row in rows],
+                                    batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0003_alter_author_pseudonym'),
+        ('book', '0017_book_published_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('books', models.PositiveIntegerField(default=0)),
+                ('published_books', models.PositiveIntegerField(default=0)),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='book_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(compute_stats, migrations.RunPython.noop),
+    ]
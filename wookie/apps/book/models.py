@@ -1,28 +1,196 @@
+from collections import Counter, defaultdict
+
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import validate_image_file_extension, MinLengthValidator
-from django.db import models
+from django.db import models, router, transaction
+from django.dispatch import Signal
+
+from wookie.apps.book.storage import get_cover_storage
 
 USER_MODEL = get_user_model()
 
+# Sent once per `BookQuerySet.delete()`, in its transaction, with the deleted rows as `books`.
+# Book has no pre/post_delete receivers, so a delete of any number of books stays one `DELETE`
+# and its bookkeeping (search index, covers, stats) runs once for all of them.
+books_deleted = Signal()
+
+
+class BookQuerySet(models.QuerySet):
+    def for_serializer(self):
+        """
+        Load only the columns `BookSerializer` (and the list validators/cursor) read. The
+        author's pseudonym is copied on the book row, so no Author row is fetched or joined.
+        """
+        return self.only('id', 'title', 'author_pseudonym', 'description', 'cover_image', 'cover_thumbnails',
+                         'price', 'published', 'created_at', 'updated_at')
+
+    def values_for_serializer(self):
+        """
+        The same projection as `for_serializer()` as plain `values()` rows, for `BookReadSerializer`.
+        The `rank` of a search comes along, for the cursor of ranked pages.
+        """
+        fields = ['id', 'title', 'author_pseudonym', 'description', 'cover_image', 'cover_thumbnails', 'price',
+                  'published', 'created_at', 'updated_at']
+        if 'rank' in self.query.annotations:
+            fields.append('rank')
+        return self.for_serializer().values(*fields)
+
+    def delete(self):
+        deleted = len(self.delete_rows())
+        return deleted, {self.model._meta.label: deleted}
+
+    def delete_rows(self):
+        """
+        Delete the books with one `DELETE`, then send `books_deleted` with the rows, read and
+        locked first with the fields its receivers need. Returns those rows.
+        """
+        locked = self.select_for_update()
+        with transaction.atomic(using=locked.db, savepoint=False):
+            books = list(locked.only('id', 'author_id', 'published', 'price', 'cover_image', 'cover_thumbnails'))
+            if books:
+                super().delete()
+                books_deleted.send(sender=self.model, books=books)
+        return books
+
 
 class Book(models.Model):
     author = models.ForeignKey(USER_MODEL, on_delete=models.DO_NOTHING)
+    # Copy of `author.pseudonym`, so listing and filtering books never joins the author; kept
+    # up to date by `save()` and, when an author is renamed, by the author's post_save signal.
+    author_pseudonym = models.CharField(max_length=255, db_index=True, editable=False, default='')
     title = models.CharField(max_length=255, db_index=True, validators=[MinLengthValidator(3)])
     description = models.TextField(validators=[MinLengthValidator(3)])
-    cover_image = models.ImageField(upload_to='images/book-covers', verbose_name='cover image', max_length=500,
+    cover_image = models.ImageField(upload_to='images/book-covers', storage=get_cover_storage,
+                                    verbose_name='cover image', max_length=500,
                                     validators=[validate_image_file_extension],
                                     error_messages={'invalid_extension': '%(value)s'}, blank=True, null=True)
+    # Thumbnail size (px) -> file name, filled once the cover has been processed
+    cover_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = BookQuerySet.as_manager()
 
     class Meta:
         ordering = ['-published']
+        # Public queries only ever read published books, so their indexes leave the others out:
+        # the list order and its keyset cursor, `min_price`/`max_price` ranges and the
+        # `Max(updated_at)` behind the list validators. The trigram indexes serving the text
+        # filters are PostgreSQL only and created by migrations.
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(published=True),
+                         name='book_published_created_idx'),
+            models.Index(fields=['price', '-created_at', '-id'], condition=models.Q(published=True),
+                         name='book_published_price_idx'),
+            models.Index(fields=['updated_at'], condition=models.Q(published=True),
+                         name='book_published_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        book = super().from_db(db, field_names, values)
+        book._loaded_author_id = book.__dict__.get('author_id')
+        return book
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # New books and books moved to another author copy the pseudonym; a deferred author
+        # was not touched.
+        if 'author_id' in self.__dict__ and self.author_id != self.__dict__.get('_loaded_author_id'):
+            if self.author_id is not None:
+                self.author_pseudonym = self.author.pseudonym
+            if update_fields is not None and 'author' in update_fields:
+                update_fields = {*update_fields, 'author_pseudonym'}
+        # A new cover is written, and its `CoverBlob` row locked, in the transaction the
+        # post_save signal acquires the reference in (see `ContentAddressedStorage._save`).
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, update_fields=update_fields, **kwargs)
+        self._loaded_author_id = self.__dict__.get('author_id')
+
+    def delete(self, using=None, keep_parents=False):
+        # Through `BookQuerySet.delete()`, for its `books_deleted` signal.
+        if self.pk is None:
+            raise ValueError(f"{self._meta.object_name} object can't be deleted because its id is None.")
+        using = using or router.db_for_write(type(self), instance=self)
+        deleted = type(self).objects.using(using).filter(pk=self.pk).delete()
+        self.pk = None
+        return deleted
 
     @property
-    def author_pseudonym(self):
-        return self.author.pseudonym
+    def cover_names(self):
+        """
+        Every blob this book points at: the cover and its thumbnails.
+        """
+        names = set(self.cover_thumbnails.values())
+        if self.cover_image:
+            names.add(self.cover_image.name)
+        return names
 
     def __str__(self):
         return self.title
+
+
+class AuthorStats(models.Model):
+    """
+    Book counts of an author and the price total of their published books, moved by the
+    difference of every write in `wookie.apps.book.stats.update_author_stats`.
+    """
+    author = models.OneToOneField(USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='book_stats')
+    books = models.PositiveIntegerField(default=0)
+    published_books = models.PositiveIntegerField(default=0)
+    price_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f'{self.author_id}: {self.books} books'
+
+
+class CoverBlobQuerySet(models.QuerySet):
+    def acquire(self, names):
+        for name in names:
+            _, created = self.get_or_create(name=name, defaults={'references': 1})
+            if not created:
+                self.filter(name=name).update(references=models.F('references') + 1)
+
+    def release(self, names):
+        """
+        Drop one reference to each of `names` (a name listed twice loses two). Blobs nobody
+        points at anymore are deleted from the storage once the transaction commits.
+        """
+        counts = Counter(names)
+        if not counts:
+            return
+        by_count = defaultdict(list)
+        for name, count in counts.items():
+            by_count[count].append(name)
+        for count, group in by_count.items():
+            self.filter(name__in=group).update(references=models.F('references') - count)
+        transaction.on_commit(lambda: self.collect(list(counts)))
+
+    def collect(self, names):
+        storage = get_cover_storage()
+        for name in names:
+            # Only blobs still unreferenced now are deleted: one acquired again since the
+            # release keeps its row and its file. The file goes while the DELETE holds the row
+            # lock, so a concurrent save of the same content waits and writes it again.
+            with transaction.atomic():
+                deleted, _ = self.filter(name=name, references__lte=0).delete()
+                if deleted:
+                    storage.delete(name)
+
+
+class CoverBlob(models.Model):
+    """
+    Reference count of a cover blob in the content-addressed storage, shared by every book
+    whose cover or thumbnails have the same content.
+    """
+    name = models.CharField(max_length=500, primary_key=True)
+    references = models.IntegerField(default=0)
+
+    objects = CoverBlobQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,162 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+from functools import reduce
+from math import isfinite
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def parse_id(value):
+    # Beyond the 64-bit id column the seek itself would fail, e.g. with an OverflowError on SQLite.
+    value = int(value)
+    if not 0 < value < 2 ** 63:
+        raise ValueError(value)
+    return value
+
+
+def parse_finite_float(value):
+    # `float()` also takes `nan` and `inf`, which no rank is.
+    value = float(value)
+    if not isfinite(value):
+        raise ValueError(value)
+    return value
+
+
+class BookKeysetPagination(BasePagination):
+    """
+    Cursor pagination over the `(created_at, id)` key of `Book.objects.values_for_serializer()` rows,
+    or over `(rank, id)` in the relevance order of a ranked search.
+
+    Pages are fetched with a `WHERE (created_at, id) < cursor` seek instead of an OFFSET, so
+    latency does not grow with page depth. The mode is opt-in: it is only applied when the
+    request carries a `cursor` or `page_size` query parameter.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = settings.BOOK_PAGE_SIZE
+    max_page_size = settings.BOOK_MAX_PAGE_SIZE
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+    # How each key field is read back from a cursor.
+    cursor_parsers = {'created_at': parse_datetime, 'rank': parse_finite_float, 'id': parse_id}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (queryset := self.get_page_queryset(queryset, request)) is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        if (queryset := self.get_page_queryset(queryset, request)) is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.key = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.key)
+        if encoded := params.get(self.cursor_query_param):
+            queryset = queryset.filter(self.get_seek_filter(self.decode_cursor(encoded)))
+        # One row more than the page tells whether there is a next page.
+        return queryset[:self.page_size + 1]
+
+    def get_ordering(self, queryset):
+        # A ranked search keeps the relevance order its backend set, e.g. `('-rank', '-id')`.
+        if 'rank' in queryset.query.annotations:
+            return tuple(queryset.query.order_by)
+        return self.ordering
+
+    def get_seek_filter(self, values):
+        """
+        The rows after `values` in the key order: `a < x OR (a = x AND b < y)` for `(-a, -b)`.
+        """
+        conditions, equal = [], {}
+        for field, value in zip(self.key, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': value}))
+            equal[name] = value
+        return reduce(or_, conditions)
+
+    def set_page(self, page):
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(request.query_params[self.page_size_query_param], strict=True,
+                                 cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def encode_cursor(self, row):
+        values = (row[field.lstrip('-')] for field in self.key)
+        raw = '|'.join(value.isoformat() if isinstance(value, datetime) else str(value) for value in values)
+        return urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        try:
+            raw = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            if len(raw) != len(self.key):
+                raise ValueError
+            values = [self.cursor_parsers[field.lstrip('-')](value) for field, value in zip(self.key, raw)]
+        except (BinasciiError, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_fields(self, view):
+        return [
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.String(title='Cursor', description='The pagination cursor value.')
+            ),
+            coreapi.Field(
+                name=self.page_size_query_param,
+                required=False,
+                location='query',
+                schema=coreschema.Integer(title='Page size', description='Number of results to return per page.')
+            ),
+        ]
@@ -0,0 +1,110 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils.module_loading import import_string
+
+WORD_RE = re.compile(r'\w+')
+
+
+class BaseSearchBackend:
+    """
+    A full-text index over the title, description and author pseudonym of books.
+
+    The index is maintained by the application: `index` is called whenever one of the
+    indexed columns may have changed and `remove` when books are deleted.
+    """
+
+    def search(self, queryset, query):
+        """
+        Filter `queryset` down to books matching `query`, annotated with a `rank` and
+        ordered by relevance.
+        """
+        raise NotImplementedError('`search()` must be implemented.')
+
+    def index(self, queryset):
+        raise NotImplementedError('`index()` must be implemented.')
+
+    def remove(self, pks):
+        raise NotImplementedError('`remove()` must be implemented.')
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Stores a weighted `tsvector` in `Book.search_vector`, served by a GIN index.
+    """
+    config = 'english'
+
+    def get_vector(self):
+        return (SearchVector('title', weight='A', config=self.config) +
+                SearchVector('author_pseudonym', weight='A', config=self.config) +
+                SearchVector('description', weight='B', config=self.config))
+
+    def search(self, queryset, query):
+        query = SearchQuery(query, search_type='websearch', config=self.config)
+        # `ts_rank` is a `real`: cast to the double precision a cursor's rank is compared as, or
+        # the `(rank, id)` seek misses the ties and repeats or skips rows.
+        return queryset.filter(search_vector=query)\
+            .annotate(rank=Cast(SearchRank(F('search_vector'), query), FloatField()))\
+            .order_by('-rank', '-id')
+
+    def index(self, queryset):
+        queryset.update(search_vector=self.get_vector())
+
+    def remove(self, pks):
+        # The vector lives on the row itself and goes away with it.
+        pass
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    Development fallback backed by the `book_book_fts` FTS5 table, keyed by book id.
+    """
+    table = 'book_book_fts'
+
+    def to_match(self, query):
+        # Quote every term so user input can never be parsed as FTS5 syntax.
+        return ' '.join(f'"{word}"*' for word in WORD_RE.findall(query))
+
+    def search(self, queryset, query):
+        match = self.to_match(query)
+        if not match:
+            return queryset.none()
+        matches = RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', (match,))
+        rank = RawSQL(f'SELECT bm25({self.table}, 10.0, 5.0, 10.0) FROM {self.table} '
+                      f'WHERE {self.table} MATCH %s AND rowid = book_book.id', (match,))
+        return queryset.filter(id__in=matches).annotate(rank=rank).order_by('rank', '-id')
+
+    def index(self, queryset):
+        rows = queryset.values_list('id', 'title', 'description', 'author_pseudonym')
+        with connection.cursor() as cursor:
+            for chunk in chunked(list(rows), 500):
+                self.remove([row[0] for row in chunk])
+                cursor.executemany(f'INSERT INTO {self.table} (rowid, title, description, author_pseudonym) '
+                                   f'VALUES (%s, %s, %s, %s)', chunk)
+
+    def remove(self, pks):
+        with connection.cursor() as cursor:
+            for chunk in chunked(list(pks), 500):
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({", ".join(["%s"] * len(chunk))})', chunk)
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def get_search_backend():
+    if settings.BOOK_SEARCH_BACKEND:
+        return import_string(settings.BOOK_SEARCH_BACKEND)()
+    return BACKENDS[connection.vendor]()
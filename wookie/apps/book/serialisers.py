@@ -1,12 +1,149 @@
+from decimal import Context, Decimal
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.validators import validate_image_file_extension
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
+from wookie.apps.book.filters import BookFilter
 from wookie.apps.book.models import Book
+from wookie.metrics import time_serializer
 
 
 class BookSerializer(serializers.ModelSerializer):
+    # Only the extension is checked while the request is open; the content itself is verified
+    # and re-encoded by the cover processing pool once the book is saved.
+    cover_image = serializers.FileField(max_length=500, allow_null=True, required=False,
+                                        validators=[validate_image_file_extension])
+    cover_thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = Book
-        fields = ['id', 'title', 'author_pseudonym', 'description', 'cover_image', 'price', 'published']
+        fields = ['id', 'title', 'author_pseudonym', 'description', 'cover_image', 'cover_thumbnails', 'price',
+                  'published']
         extra_kwargs = {
             'author_pseudonym': {'read_only': True}
 
         }
+
+    @property
+    def data(self):
+        with time_serializer():
+            return super().data
+
+    def is_valid(self, raise_exception=False):
+        with time_serializer():
+            return super().is_valid(raise_exception=raise_exception)
+
+    def update(self, instance, validated_data):
+        if 'cover_image' in validated_data:
+            # The thumbnails belong to the previous cover until the new one is processed.
+            instance.cover_thumbnails = {}
+        return super().update(instance, validated_data)
+
+    def get_cover_thumbnails(self, book):
+        storage = Book._meta.get_field('cover_image').storage
+        request = self.context.get('request')
+        urls = {}
+        for size, name in book.cover_thumbnails.items():
+            url = storage.url(name)
+            urls[size] = request.build_absolute_uri(url) if request else url
+        return urls
+
+
+class BookBulkSerializer(serializers.Serializer):
+    """
+    Selects the books of a bulk action, either by `ids` or by `filter`, a dict of `BookFilter`
+    parameters (e.g. `{"title": "python", "max_price": 10}`).
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False,
+                                max_length=settings.BOOK_BULK_MAX_IDS)
+    filter = serializers.DictField(child=serializers.CharField(), required=False, allow_empty=False)
+
+    def validate_filter(self, value):
+        # `BookFilter` ignores unknown and empty parameters: a typo would select every book.
+        if unknown := sorted(set(value) - set(BookFilter.base_filters) | {'facets'}.intersection(value)):
+            raise serializers.ValidationError(f'Unknown filters: {", ".join(unknown)}.')
+        if not BookFilter.is_filtering(value):
+            raise serializers.ValidationError('Pass at least one non-empty filter.')
+        return value
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Pass either `ids` or `filter`.')
+        return attrs
+
+
+class BookStatsSerializer(serializers.Serializer):
+    books = serializers.IntegerField()
+    published_books = serializers.IntegerField()
+    published_ratio = serializers.FloatField()
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    average_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class BookReadSerializer:
+    """
+    Read-only fast path for `BookSerializer`.
+
+    Builds the output straight from `Book.objects.values_for_serializer()` rows instead of
+    running every DRF field per instance, and renders to exactly the same JSON/XML. Takes the
+    same `many` and `context` arguments so read views can swap it in.
+    """
+    fields = BookSerializer.Meta.fields
+
+    def __init__(self, instance, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+        price = Book._meta.get_field('price')
+        self.price_quantum = Decimal(1).scaleb(-price.decimal_places)
+        self.price_context = Context(prec=price.max_digits)
+        self.storage = Book._meta.get_field('cover_image').storage
+        self.cover_urls = {}
+
+    @property
+    def data(self):
+        with time_serializer():
+            if self.many:
+                return list(self.stream())
+            return self.to_representation(self.instance)
+
+    def stream(self):
+        return (self.to_representation(row) for row in self.instance)
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'author_pseudonym': row['author_pseudonym'],
+            'description': row['description'],
+            'cover_image': self.get_cover_url(row['cover_image']) if row['cover_image'] else None,
+            'cover_thumbnails': {size: self.get_cover_url(name) for size, name in row['cover_thumbnails'].items()},
+            'price': self.format_price(row['price']),
+            'published': row['published'],
+        }
+
+    def get_cover_url(self, name):
+        # Mirrors `ImageField.to_representation`. With the file system storage a url is its
+        # directory's url plus the quoted file name, so urljoin only runs once per directory.
+        if isinstance(self.storage, FileSystemStorage):
+            directory, _, filename = name.rpartition('/')
+            if (url := self.cover_urls.get(directory)) is None:
+                url = self.cover_urls[directory] = self.get_absolute_url(f'{directory}/' if directory else '')
+            return url + filepath_to_uri(filename)
+        return self.get_absolute_url(name)
+
+    def get_absolute_url(self, name):
+        url = self.storage.url(name)
+        if request := self.context.get('request'):
+            url = request.build_absolute_uri(url)
+        return url
+
+    def format_price(self, value):
+        # Mirrors `DecimalField.to_representation` with COERCE_DECIMAL_TO_STRING.
+        if value is None:
+            return None
+        return '{:f}'.format(value.quantize(self.price_quantum, context=self.price_context))
@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from wookie.apps.book.cache import bump_catalog_version
+from wookie.apps.book.models import Book, CoverBlob, books_deleted
+from wookie.apps.book.search import get_search_backend
+from wookie.apps.book.stats import STATS_FIELDS, get_stats_row, update_author_stats
+
+USER_MODEL = get_user_model()
+
+SEARCH_FIELDS = {'title', 'description', 'author', 'author_pseudonym'}
+COVER_FIELDS = {'cover_image', 'cover_thumbnails'}
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, update_fields=None, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+    if update_fields and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    get_search_backend().index(Book.objects.filter(pk=instance.pk))
+
+
+@receiver(books_deleted, sender=Book)
+def unindex_books(sender, books, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+    get_search_backend().remove([book.pk for book in books])
+
+
+@receiver(post_save, sender=USER_MODEL)
+def rename_author_books(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and 'pseudonym' not in update_fields):
+        return
+    # One UPDATE for all the books still showing another pseudonym; none when it is unchanged.
+    books = Book.objects.filter(author=instance).exclude(author_pseudonym=instance.pseudonym)
+    if books.update(author_pseudonym=instance.pseudonym, updated_at=timezone.now()):
+        transaction.on_commit(bump_catalog_version)
+        get_search_backend().index(Book.objects.filter(author=instance))
+
+
+@receiver(pre_save, sender=Book)
+def remember_stored_book(sender, instance, raw=False, update_fields=None, using=None, **kwargs):
+    """
+    Read what the save overwrites in one query: the covers for `count_cover_references` and
+    the stats fields for `update_book_stats`. Locked when saved in a transaction, so
+    concurrent saves of a book move the stats one after the other.
+    """
+    if raw:
+        return
+    covers = not update_fields or COVER_FIELDS.intersection(update_fields)
+    stats = not update_fields or STATS_FIELDS.intersection(update_fields)
+    if not (covers or stats):
+        return
+    stored = None
+    if not instance._state.adding:
+        books = Book.objects.using(using).filter(pk=instance.pk)
+        if transaction.get_connection(using).in_atomic_block:
+            books = books.select_for_update()
+        stored = books.only('author_id', 'published', 'price', 'cover_image', 'cover_thumbnails').first()
+    if covers:
+        instance._stored_cover_names = stored.cover_names if stored else set()
+    if stats:
+        instance._stored_stats_rows = [get_stats_row(stored)] if stored else []
+
+
+@receiver(post_save, sender=Book)
+def count_cover_references(sender, instance, **kwargs):
+    stored = instance.__dict__.pop('_stored_cover_names', None)
+    if stored is None:
+        return
+    names = instance.cover_names
+    CoverBlob.objects.acquire(names - stored)
+    CoverBlob.objects.release(stored - names)
+
+
+@receiver(books_deleted, sender=Book)
+def release_covers(sender, books, **kwargs):
+    CoverBlob.objects.release(name for book in books for name in book.cover_names)
+
+
+@receiver(post_save, sender=Book)
+def update_book_stats(sender, instance, **kwargs):
+    stored = instance.__dict__.pop('_stored_stats_rows', None)
+    if stored is None:
+        return
+    update_author_stats(added=[get_stats_row(instance)], removed=stored)
+
+
+@receiver(books_deleted, sender=Book)
+def remove_from_author_stats(sender, books, **kwargs):
+    update_author_stats(removed=[get_stats_row(book) for book in books])
@@ -0,0 +1,80 @@
+from collections import Counter, defaultdict
+
+from django.db.models import F, Max, Min, Sum
+
+from wookie.apps.book.models import AuthorStats, Book
+
+# Book fields the stats are computed from; saves touching none of them leave the stats alone.
+STATS_FIELDS = {'author', 'published', 'price'}
+# Counts kept on `AuthorStats`; the catalog's are their sums.
+COUNTED_FIELDS = ('books', 'published_books', 'price_total')
+
+
+def count_books(added=(), removed=()):
+    """
+    How the counts of each author move when the `added` books are written and the `removed`
+    ones are gone, both given as `(author_id, published, price)` tuples.
+    """
+    changes = defaultdict(Counter)
+    for books, sign in ((added, 1), (removed, -1)):
+        for author_id, published, price in books:
+            change = changes[author_id]
+            change['books'] += sign
+            if published:
+                change['published_books'] += sign
+                change['price_total'] += sign * price
+    return changes
+
+
+def update_author_stats(added=(), removed=()):
+    """
+    Move the stats of the authors of the `added` and `removed` books by the difference, with
+    one `UPDATE ... SET books = books + %s` per author whose counts change. Called in the
+    transaction of every write to books, with the old values of the rows it rewrites.
+
+    Only the rows of those authors are locked, in id order: writers of different authors
+    never wait on each other.
+    """
+    for author_id, change in sorted(count_books(added, removed).items()):
+        change = {field: value for field, value in change.items() if value}
+        if not change:
+            continue
+        stats = AuthorStats.objects.filter(author_id=author_id)
+        if stats.update(**{field: F(field) + value for field, value in change.items()}):
+            continue
+        # The author's first book.
+        _, created = AuthorStats.objects.get_or_create(author_id=author_id, defaults=change)
+        if not created:
+            stats.update(**{field: F(field) + value for field, value in change.items()})
+
+
+def get_stats_row(book):
+    return book.author_id, book.published, Book._meta.get_field('price').to_python(book.price)
+
+
+async def aget_price_range(books):
+    # Read from `book_published_price_idx`, a min/max index lookup on PostgreSQL.
+    return await books.filter(published=True).aaggregate(min_price=Min('price'), max_price=Max('price'))
+
+
+async def aget_author_stats(author_id):
+    counts = await AuthorStats.objects.filter(author_id=author_id).values(*COUNTED_FIELDS).afirst()
+    return summarize(counts or {}, await aget_price_range(Book.objects.filter(author_id=author_id)))
+
+
+async def aget_catalog_stats():
+    counts = await AuthorStats.objects.aaggregate(**{field: Sum(field) for field in COUNTED_FIELDS})
+    return summarize(counts, await aget_price_range(Book.objects.all()))
+
+
+def summarize(counts, price_range):
+    books = counts.get('books') or 0
+    published_books = counts.get('published_books') or 0
+    return {
+        'books': books,
+        'published_books': published_books,
+        'published_ratio': published_books / books if books else None,
+        'min_price': price_range['min_price'],
+        'max_price': price_range['max_price'],
+        'average_price': counts['price_total'] / published_books if published_books else None,
+    }
@@ -0,0 +1,63 @@
+import hashlib
+import os
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+COVER_DIRECTORY = 'images/book-covers'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names every file after the SHA-256 of its content, so identical
+    uploads end up as one blob: `<directory>/<first 2 hex digits>/<digest><extension>`.
+
+    Only the extension of the requested name is kept. A blob that already exists is not
+    written again, and since a name always maps to the same bytes it can be cached forever.
+    Blobs are reference counted by `CoverBlob`: save them in the transaction that acquires
+    the reference, as `Book.save()` does.
+    """
+    hash_chunk_size = 64 * 2 ** 10
+
+    def __init__(self, directory=COVER_DIRECTORY, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+
+    def get_blob_name(self, name, content):
+        """
+        Hash `content` chunk by chunk, so an upload spooled to disk is never read into memory.
+        """
+        digest = hashlib.sha256()
+        for chunk in content.chunks(self.hash_chunk_size):
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return f'{self.directory}/{digest[:2]}/{digest}{extension}'
+
+    def _save(self, name, content):
+        blob_name = self.get_blob_name(name, content)
+        blobs = apps.get_model('book', 'CoverBlob').objects
+        with transaction.atomic():
+            # The blob's row stays locked until the transaction commits: a concurrent
+            # `collect()` deleting the blob finishes first, so `exists()` is not stale, or waits
+            # and finds the reference acquired in the meantime. Collected itself after the
+            # commit in case nothing acquired it.
+            blobs.select_for_update().get_or_create(name=blob_name)
+            transaction.on_commit(lambda: blobs.collect([blob_name]))
+            if self.exists(blob_name):
+                return blob_name
+            saved_name = super()._save(blob_name, content)
+            if saved_name != blob_name:
+                # Another worker wrote the same blob in the meantime; keep theirs.
+                super().delete(saved_name)
+        return blob_name
+
+
+cover_storage = ContentAddressedStorage()
+
+
+def get_cover_storage():
+    return cover_storage
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from wookie.apps.book.serialisers import BookReadSerializer
+
+STREAM_QUERY_PARAM = 'stream'
+TRUE_VALUES = {'1', 'true', 'True'}
+
+
+def is_streaming_requested(request):
+    """
+    Streaming is opt-in with `?stream=true` and needs a renderer that can emit a list
+    incrementally; other renderers (e.g. the browsable API) get the buffered response.
+    """
+    return request.query_params.get(STREAM_QUERY_PARAM) in TRUE_VALUES \
+        and hasattr(request.accepted_renderer, 'render_stream')
+
+
+def get_streaming_response(request, rows, context=None):
+    """
+    Stream `values_for_serializer()` rows through the negotiated renderer, reading them with
+    a server-side cursor so neither the rows nor the rendered body are held in memory.
+    """
+    renderer = request.accepted_renderer
+    serializer = BookReadSerializer(rows.iterator(chunk_size=settings.BOOK_STREAM_CHUNK_SIZE), many=True,
+                                    context=context)
+    content_type = request.accepted_media_type
+    if renderer.charset:
+        content_type = f'{content_type}; charset={renderer.charset}'
+    return StreamingHttpResponse(renderer.render_stream(serializer.stream(), request.accepted_media_type),
+                                 content_type=content_type)
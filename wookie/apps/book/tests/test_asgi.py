@@ -0,0 +1,52 @@
+import json
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from model_bakery import baker
+from prometheus_client import REGISTRY
+from rest_framework.test import APITransactionTestCase
+from wookie.asgi import application
+
+USER_MODEL = get_user_model()
+
+
+class ASGIHandlerTests(APITransactionTestCase):
+    def setUp(self):
+        author = USER_MODEL.objects.create_user(username='hamid', pseudonym='h.samsami', password='hamid')
+        baker.make('book', _quantity=250, author=author, published=True)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, path, query_string=b''):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query_string, 'headers': [],
+                 'server': ('testserver', 80)}
+        async_to_sync(application)(scope, receive, send)
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        return messages[0]['status'], body
+
+    def test_streams_a_queryset_through_the_event_loop(self):
+        status, body = self.get(reverse('book-list'), b'stream=true')
+        _, buffered = self.get(reverse('book-list'))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(body)), 250)
+        self.assertEqual(json.loads(body), json.loads(buffered))
+
+    def test_metrics_count_the_queries_of_async_views(self):
+        def get_queries():
+            return REGISTRY.get_sample_value('wookie_request_db_queries_sum', {'route': 'v1/book/'}) or 0
+
+        before = get_queries()
+        status, _ = self.get(reverse('book-list'), b'page_size=5')
+        self.assertEqual(status, 200)
+        self.assertEqual(get_queries() - before, 2)
@@ -0,0 +1,130 @@
+import os
+from datetime import timedelta
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+from wookie.apps.book.images import encode_image, process_cover
+from wookie.apps.book.models import Book
+from wookie.apps.book.serialisers import BookSerializer
+
+USER_MODEL = get_user_model()
+
+
+def make_jpeg(size=(800, 600)):
+    exif = Image.Exif()
+    exif[0x010F] = 'Wookiee Camera'  # Make
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class CoverProcessingTests(APITestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.settings_override.enable()
+        self.author = USER_MODEL.objects.create_user(username='hamid', pseudonym='h.samsami', password='hamid')
+        self.params = {
+            'author': self.author,
+            'title': 'Python Distilled',
+            'description': 'This is a book based on my 25 years of coding',
+            'price': 12,
+            'published': True,
+        }
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media.cleanup()
+
+    def test_cover_is_reencoded_without_metadata_and_thumbnailed(self):
+        book = Book.objects.create(cover_image=SimpleUploadedFile('cover.jpg', make_jpeg()), **self.params)
+        original = book.cover_image.path
+        with self.captureOnCommitCallbacks(execute=True):
+            process_cover(book.id)
+        book.refresh_from_db()
+
+        self.assertFalse(os.path.exists(original))
+        self.assertTrue(book.cover_image.name.endswith('.webp'))
+        with Image.open(book.cover_image.path) as cover:
+            self.assertEqual(cover.format, 'WEBP')
+            self.assertEqual(cover.size, (800, 600))
+            self.assertFalse(cover.getexif())
+        self.assertEqual(set(book.cover_thumbnails), {'128', '256', '512'})
+        with Image.open(book.cover_image.storage.path(book.cover_thumbnails['128'])) as thumbnail:
+            self.assertEqual(thumbnail.size, (128, 96))
+
+    def test_invalid_cover_is_dropped(self):
+        book = Book.objects.create(cover_image=SimpleUploadedFile('cover.gif', b'not an image'), **self.params)
+        original = book.cover_image.path
+        with self.captureOnCommitCallbacks(execute=True):
+            process_cover(book.id)
+        book.refresh_from_db()
+
+        self.assertFalse(os.path.exists(original))
+        self.assertFalse(book.cover_image)
+        self.assertEqual(book.cover_thumbnails, {})
+
+    def test_replaced_cover_is_left_alone(self):
+        book = Book.objects.create(cover_image=SimpleUploadedFile('cover.jpg', make_jpeg()), **self.params)
+        original = book.cover_image.path
+
+        def replace_cover(*args):
+            Book.objects.filter(id=book.id).update(cover_image='images/book-covers/other.jpg')
+            return encode_image(*args)
+
+        with mock.patch('wookie.apps.book.images.encode_image', side_effect=replace_cover), \
+                self.captureOnCommitCallbacks(execute=True):
+            process_cover(book.id)
+        book.refresh_from_db()
+
+        self.assertEqual(book.cover_image.name, 'images/book-covers/other.jpg')
+        self.assertEqual(book.cover_thumbnails, {})
+        stored = [os.path.join(root, name) for root, _, names in os.walk(self.media.name) for name in names]
+        self.assertEqual(stored, [original])
+
+    def test_command_processes_covers_whose_job_was_lost(self):
+        lost = Book.objects.create(cover_image=SimpleUploadedFile('cover.jpg', make_jpeg()), **self.params)
+        fresh = Book.objects.create(cover_image=SimpleUploadedFile('cover.jpg', make_jpeg((10, 10))), **self.params)
+        Book.objects.create(**self.params)
+        Book.objects.filter(id=lost.id).update(updated_at=lost.updated_at - timedelta(hours=1))
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_covers', min_age=60, stdout=out)
+
+        self.assertIn('1 books', out.getvalue())
+        lost.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertTrue(lost.cover_image.name.endswith('.webp'))
+        self.assertEqual(set(lost.cover_thumbnails), {'128', '256', '512'})
+        self.assertEqual(fresh.cover_thumbnails, {})
+
+    def test_serializer_exposes_thumbnail_urls(self):
+        book = Book.objects.create(cover_image=SimpleUploadedFile('cover.jpg', make_jpeg()), **self.params)
+        process_cover(book.id)
+        book.refresh_from_db()
+
+        data = BookSerializer(book).data
+        self.assertEqual(data['cover_thumbnails']['256'], book.cover_image.storage.url(book.cover_thumbnails['256']))
+
+    def test_create_schedules_processing_after_commit(self):
+        resp = self.client.post(reverse('token_obtain_pair'), data={'username': 'hamid', 'password': 'hamid'})
+        token = f'Bearer {resp.data["access"]}'
+        params = {k: v for k, v in self.params.items() if k != 'author'}
+        params['cover_image'] = SimpleUploadedFile('cover.jpg', make_jpeg(), content_type='image/jpeg')
+
+        with mock.patch('wookie.apps.book.v1.views.schedule_cover_processing') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(reverse('book-create'), HTTP_AUTHORIZATION=token, data=params)
+                schedule.assert_not_called()
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        schedule.assert_called_once_with(resp.data['id'])
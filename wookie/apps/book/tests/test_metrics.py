@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from model_bakery import baker
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APITestCase
+from wookie.db.pool import ConnectionPool, PoolTimeout
+
+USER_MODEL = get_user_model()
+
+
+class MetricsMiddlewareTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = USER_MODEL.objects.create_user(username='hamid', pseudonym='h.samsami', password='hamid')
+        baker.make('book', author=author, published=True, _quantity=5)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def get_samples(self, route):
+        return {
+            'requests': self.get_sample('wookie_request_duration_seconds_count', method='GET', route=route,
+                                        status='200'),
+            'queries': self.get_sample('wookie_request_db_queries_sum', route=route),
+            'query_time': self.get_sample('wookie_request_db_duration_seconds_sum', route=route),
+            'serializer_time': self.get_sample('wookie_request_serializer_duration_seconds_sum', route=route),
+            'renderer_time': self.get_sample('wookie_request_renderer_duration_seconds_sum', route=route),
+        }
+
+    def test_request_is_observed_per_route(self):
+        before = self.get_samples('v1/book/')
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('book-list'))
+        after = self.get_samples('v1/book/')
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(after['requests'] - before['requests'], 1)
+        self.assertEqual(after['queries'] - before['queries'], 2)
+        for name in ('query_time', 'serializer_time', 'renderer_time'):
+            self.assertGreater(after[name], before[name], name)
+
+    def test_unknown_urls_share_one_route(self):
+        before = self.get_sample('wookie_request_duration_seconds_count', method='OTHER', route='unmatched',
+                                 status='404')
+        self.client.generic('BREW', '/coffee/')
+        after = self.get_sample('wookie_request_duration_seconds_count', method='OTHER', route='unmatched',
+                                status='404')
+        self.assertEqual(after - before, 1)
+
+
+class MetricsViewTests(APITestCase):
+    @override_settings(METRICS_TOKEN='')
+    def test_not_served_without_a_token(self):
+        resp = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_scrapes_need_the_token(self):
+        resp = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.get(reverse('book-list'))
+        resp = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'wookie_request_duration_seconds_bucket{', resp.content)
+        self.assertIn(b'route="v1/book/"', resp.content)
+
+
+class PoolMetricsTests(APITestCase):
+    def get_sample(self, name):
+        return REGISTRY.get_sample_value(name, {'database': 'metrics-test'}) or 0
+
+    def test_pools_are_exported_per_database(self):
+        first = ConnectionPool(max_size=2, timeout=0, database='metrics-test')
+        second = ConnectionPool(max_size=1, timeout=0, database='metrics-test')
+        first.putconn(first.getconn(mock.Mock))
+        first.getconn(mock.Mock)
+        connection = second.getconn(mock.Mock)
+        with self.assertRaises(PoolTimeout), self.assertLogs('wookie.db.pool', 'WARNING'):
+            second.getconn(mock.Mock)
+
+        self.assertEqual(self.get_sample('wookie_db_pool_connections_in_use'), 2)
+        self.assertEqual(self.get_sample('wookie_db_pool_connections_idle'), 0)
+        self.assertEqual(self.get_sample('wookie_db_pool_timeouts_total'), 1)
+        self.assertEqual(self.get_sample('wookie_db_pool_wait_seconds_count'), 4)
+
+        first.close()
+        self.assertEqual(self.get_sample('wookie_db_pool_connections_idle'), 0)
+        second.putconn(connection)
+        self.assertEqual(self.get_sample('wookie_db_pool_connections_in_use'), 1)
+        self.assertEqual(self.get_sample('wookie_db_pool_connections_idle'), 1)
@@ -1,10 +1,14 @@
 from os import remove
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.core.files import File
+from django.core.files.base import ContentFile
 from rest_framework.test import APITestCase
 from wookie.apps.book.models import Book
+from wookie.apps.book.storage import cover_storage
 
 USER_MODEL = get_user_model()
 
@@ -19,12 +23,12 @@ class BookModelTests(APITestCase):
     def setUp(self):
         self.create_author()
         self.file_name = 'small.gif'
-        self.file_path = 'images/book-covers/' + self.file_name
         small_gif = (
             b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
             b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
             b'\x02\x4c\x01\x00\x3b'
         )
+        self.file_path = cover_storage.path(cover_storage.get_blob_name(self.file_name, ContentFile(small_gif)))
         self.params = {
             'author': self.author,
             'title': 'Python Distilled',
@@ -60,3 +64,30 @@ class BookModelTests(APITestCase):
         self.assertIsInstance(book, Book)
         self.assertTrue(book.published)
         self.assertFalse(book.cover_image)
+
+    def test_copies_the_author_pseudonym(self):
+        self.params.pop('cover_image')
+        book = Book.objects.create(**self.params)
+        self.assertEqual(Book.objects.get(pk=book.pk).author_pseudonym, 'D.Beasley')
+
+        other = USER_MODEL.objects.create_user(username='other', pseudonym='Other', password='password')
+        book = Book.objects.get(pk=book.pk)
+        book.author = other
+        book.save(update_fields=['author'])
+        self.assertEqual(Book.objects.get(pk=book.pk).author_pseudonym, 'Other')
+
+    def test_renaming_an_author_updates_its_books_at_once(self):
+        self.params.pop('cover_image')
+        for _ in range(3):
+            Book.objects.create(**self.params)
+
+        self.author.pseudonym = 'D.Beazley'
+        with CaptureQueriesContext(connection) as queries:
+            self.author.save()
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "book_book"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(set(Book.objects.values_list('author_pseudonym', flat=True)), {'D.Beazley'})
+
+        updated_at = set(Book.objects.values_list('updated_at', flat=True))
+        self.author.save()
+        self.assertEqual(set(Book.objects.values_list('updated_at', flat=True)), updated_at)
@@ -0,0 +1,120 @@
+import threading
+import time
+from unittest import mock
+
+from psycopg2 import extensions
+from rest_framework.test import APITestCase
+
+from wookie.db.backends.postgresql.base import DatabaseWrapper
+from wookie.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(APITestCase):
+    def test_idle_connections_are_reused(self):
+        pool = ConnectionPool(max_size=2)
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+
+        self.assertIs(pool.getconn(FakeConnection), first)
+        self.assertIsNot(pool.getconn(FakeConnection), first)
+        self.assertEqual(pool.get_stats()['connections'], 2)
+        self.assertEqual(pool.get_stats()['in_use'], 2)
+
+    def test_waits_for_a_free_connection(self):
+        pool = ConnectionPool(max_size=1, timeout=5)
+        connection = pool.getconn(FakeConnection)
+        threading.Timer(0.1, pool.putconn, args=(connection,)).start()
+
+        self.assertIs(pool.getconn(FakeConnection), connection)
+        stats = pool.get_stats()
+        self.assertEqual(stats['requests'], 2)
+        self.assertGreaterEqual(stats['max_wait_time'], 0.05)
+        self.assertAlmostEqual(stats['wait_time'], stats['max_wait_time'], places=3)
+
+    def test_times_out_when_exhausted(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.getconn(FakeConnection)
+
+        with self.assertRaises(PoolTimeout), self.assertLogs('wookie.db.pool', 'WARNING'):
+            pool.getconn(FakeConnection)
+        self.assertEqual(pool.get_stats()['timeouts'], 1)
+
+    def test_failed_checks_and_discards_close_connections(self):
+        pool = ConnectionPool(max_size=1)
+        connection = pool.getconn(FakeConnection)
+        pool.putconn(connection)
+
+        fresh = pool.getconn(FakeConnection, check=lambda c: False)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(fresh, connection)
+
+        pool.putconn(fresh, discard=True)
+        self.assertTrue(fresh.closed)
+        self.assertEqual(pool.get_stats()['size'], 0)
+
+    def test_failed_connect_frees_the_slot(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        with self.assertRaises(OSError), mock.patch.object(FakeConnection, '__init__', side_effect=OSError):
+            pool.getconn(FakeConnection)
+
+        self.assertIsInstance(pool.getconn(FakeConnection), FakeConnection)
+
+    def test_expired_connections_are_not_reused(self):
+        pool = ConnectionPool(max_size=1, max_lifetime=60)
+        connection = pool.getconn(FakeConnection)
+        with mock.patch('wookie.db.pool.time.monotonic', return_value=time.monotonic() + 61):
+            pool.putconn(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.get_stats()['idle'], 0)
+
+    def test_close_closes_idle_and_returned_connections(self):
+        pool = ConnectionPool(max_size=2)
+        idle, in_use = pool.getconn(FakeConnection), pool.getconn(FakeConnection)
+        pool.putconn(idle)
+
+        pool.close()
+        self.assertTrue(idle.closed)
+        pool.putconn(in_use)
+        self.assertTrue(in_use.closed)
+
+
+class PooledDatabaseWrapperTests(APITestCase):
+    def get_wrapper(self, connection):
+        wrapper = DatabaseWrapper({
+            'NAME': 'wookie', 'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+            'OPTIONS': {'pool': {'max_size': 1}}, 'CONN_HEALTH_CHECKS': False,
+        })
+        wrapper.pool = ConnectionPool(max_size=1)
+        wrapper.connection = wrapper.pool.getconn(lambda: connection)
+        return wrapper
+
+    def test_pool_options_are_not_connection_parameters(self):
+        self.assertEqual(self.get_wrapper(mock.Mock()).get_connection_params(), {'database': 'wookie'})
+
+    def test_open_transactions_are_rolled_back_on_close(self):
+        connection = mock.Mock(closed=0)
+        connection.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        wrapper = self.get_wrapper(connection)
+
+        wrapper.close()
+        connection.rollback.assert_called_once()
+        connection.close.assert_not_called()
+        self.assertEqual(wrapper.pool.get_stats()['idle'], 1)
+
+    def test_broken_connections_are_discarded_on_close(self):
+        connection = mock.Mock(closed=0)
+        connection.info.transaction_status = extensions.TRANSACTION_STATUS_UNKNOWN
+        wrapper = self.get_wrapper(connection)
+
+        wrapper.close()
+        connection.close.assert_called_once()
+        self.assertEqual(wrapper.pool.get_stats()['size'], 0)
@@ -0,0 +1,87 @@
+from itertools import combinations
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+USER_MODEL = get_user_model()
+
+# One value per `BookFilter` parameter; every combination of them is planned.
+FILTERS = {
+    'q': 'python',
+    'title': 'python',
+    'description': 'python',
+    'author_pseudonym': 'samsami',
+    'min_price': '10',
+    'max_price': '50',
+}
+
+
+# Run with SQL_ENGINE=django.db.backends.postgresql (e.g. `docker-compose exec web python manage.py test`).
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are only checked on PostgreSQL')
+class BookQueryPlanTests(APITestCase):
+    """
+    Plan every query the book read endpoints run with sequential scans disabled, so the planner
+    picks an index whenever one can serve the query and a `Seq Scan` means none can: a filter
+    or an ordering lost its index. Tables this small would be scanned anyway otherwise.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = USER_MODEL.objects.create_user(username='hamid', pseudonym='h.samsami', password='hamid')
+        baker.make('book', author=cls.author, published=True, title='Python Distilled', price=20, _quantity=5)
+        baker.make('book', published=False, _quantity=5)
+
+    def setUp(self):
+        resp = self.client.post(reverse('token_obtain_pair'), data={'username': 'hamid', 'password': 'hamid'})
+        self.token = f'Bearer {resp.data["access"]}'
+        with connection.cursor() as cursor:
+            # Reverted with the test's transaction.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_plans(self, url, params=None):
+        """
+        The EXPLAIN output of every query on the book table run by a GET of `url`.
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(url, params, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                if query['sql'].startswith('SELECT') and '"book_book"' in query['sql']:
+                    cursor.execute(f'EXPLAIN {query["sql"]}')
+                    plans.append('\n'.join(row[0] for row in cursor.fetchall()))
+        self.assertTrue(plans)
+        return plans
+
+    def assertIndexesUsed(self, url, params=None):
+        for plan in self.get_plans(url, params):
+            self.assertNotIn('Seq Scan on book_book', plan, f'{url} {params}:\n{plan}')
+
+    def test_list_filters(self):
+        for size in range(len(FILTERS) + 1):
+            for names in combinations(FILTERS, size):
+                params = {name: FILTERS[name] for name in names}
+                with self.subTest(**params):
+                    self.assertIndexesUsed(reverse('book-list'), params)
+                    self.assertIndexesUsed(reverse('book-list'), {**params, 'page_size': 2})
+
+    def test_list_cursor(self):
+        resp = self.client.get(reverse('book-list'), {'page_size': 2, 'min_price': 10})
+        self.assertIndexesUsed(resp.data['next'])
+
+    def test_author_endpoints(self):
+        book = self.author.book_set.first()
+        self.assertIndexesUsed(reverse('book-mylist'))
+        self.assertIndexesUsed(reverse('book-detail', kwargs={'pk': book.id}))
@@ -0,0 +1,92 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.test import APITestCase
+
+from wookie.apps.book.cache import bump_catalog_version, get_catalog_version
+from wookie.apps.book.models import Book
+from wookie.db.middleware import ReplicaMiddleware
+from wookie.db.routers import ReplicaRouter, Replicas, read_from_replicas
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], DATABASE_PRIMARY_PIN_TIMEOUT=10)
+class ReplicaRoutingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        patcher = mock.patch('wookie.db.routers.replicas.get_available', return_value=['replica1'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(read_from_replicas.set, False)
+
+    def get_read_database(self, request, status=200):
+        def view(request):
+            view.database = self.router.db_for_read(Book)
+            return HttpResponse(status=status)
+        ReplicaMiddleware(view)(request)
+        return view.database
+
+    def test_safe_requests_read_from_replicas(self):
+        self.assertEqual(self.get_read_database(self.factory.get('/')), 'replica1')
+        self.assertEqual(self.get_read_database(self.factory.post('/')), 'default')
+
+    def test_writes_and_reads_outside_requests_go_to_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Book), 'default')
+        read_from_replicas.set(True)
+        self.assertEqual(self.router.db_for_write(Book), 'default')
+        self.assertFalse(self.router.allow_migrate('replica1', 'book'))
+
+    def test_writing_clients_are_pinned_to_the_primary(self):
+        self.get_read_database(self.factory.post('/', HTTP_AUTHORIZATION='Bearer a'), status=201)
+
+        request = self.factory.get('/', HTTP_AUTHORIZATION='Bearer a')
+        self.assertEqual(self.get_read_database(request), 'default')
+        self.assertTrue(request.db_pinned)
+        self.assertEqual(self.get_read_database(self.factory.get('/', HTTP_AUTHORIZATION='Bearer b')), 'replica1')
+
+    def test_failed_writes_do_not_pin(self):
+        self.get_read_database(self.factory.post('/', HTTP_AUTHORIZATION='Bearer a'), status=400)
+
+        self.assertEqual(self.get_read_database(self.factory.get('/', HTTP_AUTHORIZATION='Bearer a')), 'replica1')
+
+    def test_reads_go_to_the_primary_without_available_replicas(self):
+        with mock.patch('wookie.db.routers.replicas.get_available', return_value=[]):
+            self.assertEqual(self.get_read_database(self.factory.get('/')), 'default')
+
+    @override_settings(DATABASE_REPLICA_MAX_LAG=5, DATABASE_REPLICA_CHECK_INTERVAL=5)
+    def test_catalog_version_changes_again_after_the_replica_lag(self):
+        bump_catalog_version()
+        unsettled = get_catalog_version()
+        self.assertEqual(get_catalog_version(), unsettled)
+
+        with mock.patch('wookie.apps.book.cache.time.time', return_value=time.time() + 11):
+            settled = get_catalog_version()
+        self.assertNotEqual(settled, unsettled)
+        bump_catalog_version()
+        self.assertNotIn(get_catalog_version(), (settled, unsettled))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'], DATABASE_REPLICA_MAX_LAG=5,
+                   DATABASE_REPLICA_CHECK_INTERVAL=60)
+class ReplicasTests(APITestCase):
+    def test_lagging_and_unreachable_replicas_are_skipped(self):
+        replicas = Replicas()
+        lags = {'replica1': 1.5, 'replica2': 30}
+        with mock.patch.object(Replicas, 'get_lag', side_effect=lambda alias: lags[alias]), \
+                self.assertLogs('wookie.db.routers', 'WARNING'):
+            self.assertEqual(replicas.get_available(), ['replica1'])
+
+        with mock.patch.object(Replicas, 'get_lag', side_effect=lambda alias: None) as get_lag:
+            self.assertEqual(replicas.get_available(), ['replica1'])
+            get_lag.assert_not_called()
+
+    def test_connection_errors_mean_unreachable(self):
+        connection = mock.MagicMock(vendor='postgresql')
+        connection.cursor.side_effect = DatabaseError
+        with mock.patch('wookie.db.routers.connections', {'replica1': connection}):
+            self.assertIsNone(Replicas().get_lag('replica1'))
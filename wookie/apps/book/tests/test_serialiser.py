@@ -0,0 +1,45 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from model_bakery import baker
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_xml.renderers import XMLRenderer
+from wookie.apps.book.models import Book
+from wookie.apps.book.serialisers import BookReadSerializer, BookSerializer
+
+USER_MODEL = get_user_model()
+
+
+class BookReadSerializerTests(APITestCase):
+    def setUp(self):
+        self.author = USER_MODEL.objects.create_user(username='David Beasley',
+                                                     pseudonym='D.Beasley',
+                                                     email='dbeasly@gmail.com',
+                                                     password='password')
+        prices = [Decimal('0'), Decimal('1.5'), Decimal('12.34'), Decimal('99999999.99')]
+        for i, price in enumerate(prices):
+            baker.make('book', author=self.author, price=price, published=bool(i % 2),
+                       cover_image=f'images/book-covers/cover {i}.gif' if i % 2 else None)
+        self.request = APIRequestFactory().get('/v1/book/')
+
+    def assertRendersIdentically(self, fast, slow):
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(slow))
+        self.assertEqual(XMLRenderer().render(fast), XMLRenderer().render(slow))
+
+    def test_many_matches_model_serializer(self):
+        fast = BookReadSerializer(Book.objects.values_for_serializer(), many=True).data
+        slow = BookSerializer(Book.objects.all(), many=True).data
+        self.assertRendersIdentically(fast, slow)
+
+    def test_many_with_request_matches_model_serializer(self):
+        context = {'request': self.request}
+        fast = BookReadSerializer(Book.objects.values_for_serializer(), many=True, context=context).data
+        slow = BookSerializer(Book.objects.all(), many=True, context=context).data
+        self.assertIn('http://testserver/', JSONRenderer().render(fast).decode())
+        self.assertRendersIdentically(fast, slow)
+
+    def test_single_matches_model_serializer(self):
+        book = Book.objects.exclude(cover_image=None).first()
+        fast = BookReadSerializer(Book.objects.values_for_serializer().get(id=book.id)).data
+        slow = BookSerializer(book).data
+        self.assertRendersIdentically(fast, slow)
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import tempfile
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from wookie.apps.book.models import Book, CoverBlob
+from wookie.apps.book.storage import cover_storage
+
+USER_MODEL = get_user_model()
+
+
+class CoverStorageTests(APITestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.settings_override.enable()
+        self.author = USER_MODEL.objects.create_user(username='hamid', pseudonym='h.samsami', password='hamid')
+        self.content = b'GIF89a' + os.urandom(64)
+        digest = hashlib.sha256(self.content).hexdigest()
+        self.name = f'images/book-covers/{digest[:2]}/{digest}.gif'
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media.cleanup()
+
+    def create_book(self, **kwargs):
+        return Book.objects.create(author=self.author, title='Python Distilled', description='Python in 25 years',
+                                   price=12, cover_image=SimpleUploadedFile('Cover.GIF', self.content), **kwargs)
+
+    def test_blob_is_named_after_its_content(self):
+        self.assertEqual(cover_storage.save('images/book-covers/cover.gif', ContentFile(self.content)), self.name)
+        self.assertEqual(cover_storage.save('images/book-covers/other.gif', ContentFile(self.content)), self.name)
+        with cover_storage.open(self.name) as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(os.listdir(os.path.dirname(cover_storage.path(self.name))), [os.path.basename(self.name)])
+
+    def test_blob_nobody_acquires_is_collected_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cover_storage.save('images/book-covers/cover.gif', ContentFile(self.content))
+
+        self.assertFalse(cover_storage.exists(self.name))
+        self.assertFalse(CoverBlob.objects.filter(name=self.name).exists())
+
+    def test_blob_acquired_in_the_saving_transaction_is_kept(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_book()
+
+        self.assertTrue(cover_storage.exists(self.name))
+        self.assertEqual(CoverBlob.objects.get(name=self.name).references, 1)
+
+    def test_identical_covers_share_one_counted_blob(self):
+        first, second = self.create_book(), self.create_book()
+
+        self.assertEqual(first.cover_image.name, self.name)
+        self.assertEqual(second.cover_image.name, self.name)
+        self.assertEqual(CoverBlob.objects.get(name=self.name).references, 2)
+
+    def test_blob_is_deleted_with_its_last_reference(self):
+        first, second = self.create_book(), self.create_book()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(cover_storage.exists(self.name))
+        self.assertEqual(CoverBlob.objects.get(name=self.name).references, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.cover_image = None
+            second.save()
+        self.assertFalse(cover_storage.exists(self.name))
+        self.assertFalse(CoverBlob.objects.filter(name=self.name).exists())
+
+    def test_saves_without_cover_changes_keep_the_count(self):
+        book = self.create_book()
+        book.title = 'Python Distilled 2nd Edition'
+        book.save()
+        book.save(update_fields=['title'])
+
+        self.assertEqual(CoverBlob.objects.get(name=self.name).references, 1)
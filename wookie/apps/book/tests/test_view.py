@@ -1,13 +1,28 @@
-import os
+import json
+import msgpack
+from base64 import urlsafe_b64encode
 from os import remove
+from unittest import mock, skipUnless
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 from model_bakery import baker
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
-from wookie.apps.book.models import Book
+from wookie.apps.book.filters import BookFilter
+from wookie.apps.book.models import AuthorStats, Book, CoverBlob, books_deleted
+from wookie.apps.book.pagination import BookKeysetPagination
 from wookie.apps.book.serialisers import BookSerializer
+from wookie.apps.book.stats import COUNTED_FIELDS, count_books
+from wookie.apps.book.storage import cover_storage
+from wookie.db.inspection import assert_no_repeated_queries
 
 USER_MODEL = get_user_model()
 
@@ -18,7 +33,6 @@ class BookViewTests(APITestCase):
         cls.username = 'hamid'
         cls.password = 'hamid'
         cls.file_name = 'small.gif'
-        cls.file_path = 'images/book-covers/'
         cls.small_gif = (
             b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
             b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
@@ -27,9 +41,8 @@ class BookViewTests(APITestCase):
 
     def tearDown(self):
         # Clean up run after every test method.
-        for fname in os.listdir(self.file_path):
-            if fname.startswith(self.file_name.split('.')[0]):
-                os.remove(os.path.join(self.file_path, fname))
+        cache.clear()
+        cover_storage.delete(cover_storage.get_blob_name(self.file_name, ContentFile(self.small_gif)))
 
     def create_author(self) -> None:
         self.author = USER_MODEL.objects.create_user(username=self.username,
@@ -515,3 +528,789 @@ class ListBookViewTests(BookViewTests):
         self.assertEqual(resp.data, serializer.data)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertTrue('application/json' in resp['Content-Type'])
+
+
+# Tests for keyset pagination on path('', BookListView.as_view(), name='book-list')
+class PaginateBookListViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        for _ in range(25):
+            baker.make('book', author=self.author, published=True)
+        baker.make('book', author=self.author, published=False)
+
+    def test_response_is_not_paginated_without_params(self):
+        resp = self.client.get(reverse('book-list'))
+        self.assertEqual(len(resp.data), 25)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_response_walks_all_pages_in_stable_order(self):
+        books = list(Book.objects.filter(published=True).order_by('-created_at', '-id'))
+        seen = []
+        url = reverse('book-list') + '?page_size=10'
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(resp.data['results']), 10)
+            seen.extend(b['id'] for b in resp.data['results'])
+            url = resp.data['next']
+
+        self.assertEqual(seen, [b.id for b in books])
+
+    def test_response_page_size_is_capped(self):
+        with mock.patch.object(BookKeysetPagination, 'max_page_size', 5):
+            resp = self.client.get(reverse('book-list'), data={'page_size': 1000})
+        self.assertEqual(len(resp.data['results']), 5)
+        self.assertIsNotNone(resp.data['next'])
+
+    def test_response_404_on_invalid_cursor(self):
+        resp = self.client.get(reverse('book-list'), data={'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue('application/json' in resp['Content-Type'])
+
+    def test_response_404_on_out_of_range_cursor_id(self):
+        for book_id in (2 ** 64, 0, -1):
+            cursor = urlsafe_b64encode(f'2022-01-01T00:00:00+00:00|{book_id}'.encode()).decode()
+            resp = self.client.get(reverse('book-list'), data={'cursor': cursor})
+            self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND, book_id)
+
+
+# Tests for full-text search `q=` on path('', BookListView.as_view(), name='book-list')
+class SearchBookListViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.python = baker.make('book', author=self.author, published=True,
+                                 title='Python Distilled', description='A tour of the language')
+        self.cookbook = baker.make('book', author=self.author, published=True,
+                                   title='Cookbook', description='Recipes for Python programmers')
+        baker.make('book', author=self.author, published=False, title='Python Draft', description='Unpublished')
+        baker.make('book', published=True, title='Wookiee Poems', description='Songs from Kashyyyk')
+
+    def test_response_ranks_title_matches_first(self):
+        resp = self.client.get(reverse('book-list'), data={'q': 'python'})
+
+        self.assertEqual([b['id'] for b in resp.data], [self.python.id, self.cookbook.id])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_paginated_search_keeps_the_ranked_order(self):
+        # The cookbook is the newer book, so it would come first in date order.
+        extra = baker.make('book', author=self.author, published=True, title='Python Tricks',
+                           description='Python, Python and more Python')
+        ranked = [b['id'] for b in self.client.get(reverse('book-list'), data={'q': 'python'}).data]
+        self.assertEqual(ranked[-1], self.cookbook.id)
+
+        seen, url = [], reverse('book-list') + '?q=python&page_size=1'
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen.extend(b['id'] for b in resp.data['results'])
+            url = resp.data['next']
+        self.assertEqual(seen, ranked)
+        self.assertIn(extra.id, seen)
+        self.assertNotIn('rank', resp.data['results'][0])
+
+    @skipUnless(connection.vendor == 'postgresql', 'The rank is a float4 on PostgreSQL only')
+    def test_paginated_search_pages_through_tied_ranks(self):
+        baker.make('book', author=self.author, published=True, title='Python Tricks', description='Python tips',
+                   _quantity=5)
+        ranked = [b['id'] for b in self.client.get(reverse('book-list'), data={'q': 'python'}).data]
+
+        seen, url = [], reverse('book-list') + '?q=python&page_size=1'
+        while url and len(seen) <= len(ranked):
+            resp = self.client.get(url)
+            seen.extend(b['id'] for b in resp.data['results'])
+            url = resp.data['next']
+        self.assertEqual(seen, ranked)
+
+    def test_search_cursor_rejects_non_finite_ranks(self):
+        for rank in ('nan', 'inf', '-inf'):
+            cursor = urlsafe_b64encode(f'{rank}|{self.python.id}'.encode()).decode()
+            resp = self.client.get(reverse('book-list'), data={'q': 'python', 'cursor': cursor})
+            self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND, rank)
+
+    def test_response_search_matches_pseudonym(self):
+        resp = self.client.get(reverse('book-list'), data={'q': 'samsami'})
+        self.assertEqual({b['id'] for b in resp.data}, {self.python.id, self.cookbook.id})
+
+    def test_response_search_follows_updates_and_deletes(self):
+        self.python.title = 'Rust Distilled'
+        self.python.save()
+        self.cookbook.delete()
+
+        resp = self.client.get(reverse('book-list'), data={'q': 'distilled'})
+        self.assertEqual([b['id'] for b in resp.data], [self.python.id])
+        resp = self.client.get(reverse('book-list'), data={'q': 'recipes'})
+        self.assertEqual(resp.data, [])
+
+    def test_response_search_ignores_query_syntax(self):
+        resp = self.client.get(reverse('book-list'), data={'q': '("python*'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual({b['id'] for b in resp.data}, {self.python.id, self.cookbook.id})
+
+
+# Tests for the versioned response cache on path('', BookListView.as_view(), name='book-list')
+class CacheBookListViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.get_token()
+        self.book = baker.make('book', author=self.author, published=True, title='Python Distilled')
+
+    def test_response_is_served_from_cache(self):
+        self.client.get(reverse('book-list'))
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse('book-list'))
+
+        self.assertEqual(resp.data[0]['id'], self.book.id)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_response_cache_key_normalizes_params(self):
+        self.client.get(reverse('book-list') + '?title=python&description=&min_price=1')
+        with self.assertNumQueries(0):
+            self.client.get(reverse('book-list') + '?min_price=1&title=python')
+
+    def test_response_cache_is_invalidated_by_update(self):
+        self.client.get(reverse('book-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = 'Python Undistilled'
+            self.book.save()
+
+        resp = self.client.get(reverse('book-list'))
+        self.assertEqual(resp.data[0]['title'], 'Python Undistilled')
+
+    def test_response_cache_is_invalidated_by_unpublish(self):
+        self.client.get(reverse('book-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('book-unpublish', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+
+        resp = self.client.get(reverse('book-list'))
+        self.assertEqual(resp.data, [])
+
+    def test_response_cache_is_invalidated_by_delete(self):
+        self.client.get(reverse('book-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('book-delete', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+
+        resp = self.client.get(reverse('book-list'))
+        self.assertEqual(resp.data, [])
+
+
+# Tests for conditional GET on the book-list and book-detail paths
+class ConditionalBookViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.get_token()
+        self.book = baker.make('book', author=self.author, published=True)
+        self.url = reverse('book-detail', kwargs={'pk': self.book.id})
+
+    def test_list_response_304_when_etag_matches(self):
+        resp = self.client.get(reverse('book-list'))
+        self.assertIn('ETag', resp)
+
+        cache.clear()
+        resp = self.client.get(reverse('book-list'), HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_response_304_from_cache_without_queries(self):
+        resp = self.client.get(reverse('book-list'))
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse('book-list'), HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_response_200_after_unpublish(self):
+        resp = self.client.get(reverse('book-list'))
+        self.client.patch(reverse('book-unpublish', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+
+        cache.clear()
+        resp = self.client.get(reverse('book-list'), HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, [])
+
+    def test_list_has_no_last_modified(self):
+        last_modified = http_date(self.book.updated_at.timestamp())
+        self.client.patch(reverse('book-unpublish', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+
+        resp = self.client.get(reverse('book-list'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Last-Modified', resp)
+        resp = self.client.get(reverse('book-list'), data={'stream': 'true'})
+        self.assertNotIn('Last-Modified', resp)
+
+    def test_list_etag_differs_per_content_type(self):
+        json_resp = self.client.get(reverse('book-list'), HTTP_ACCEPT='application/json')
+        xml_resp = self.client.get(reverse('book-list'), HTTP_ACCEPT='application/xml')
+        self.assertNotEqual(json_resp['ETag'], xml_resp['ETag'])
+
+    def test_detail_response_304_when_etag_matches(self):
+        resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_response_304_when_not_modified_since(self):
+        resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+
+        resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_response_200_after_update(self):
+        resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token)
+        self.book.title = 'Python Distilled 2023'
+        self.book.save()
+
+        resp = self.client.get(self.url, HTTP_AUTHORIZATION=self.token, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['title'], 'Python Distilled 2023')
+
+
+# Query-count regression tests for every book endpoint
+class QueryCountBookViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.get_token()
+        for _ in range(10):
+            baker.make('book', author=self.author, published=True)
+        for _ in range(10):
+            baker.make('book', published=True)
+        self.book = Book.objects.filter(author=self.author).first()
+
+    def test_list_runs_aggregate_and_one_joined_select(self):
+        # Max/Count validators, then the page itself
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('book-list'), data={'author_pseudonym': 'samsami'})
+        self.assertEqual(len(resp.data), 10)
+
+    def test_paginated_list_runs_aggregate_and_one_joined_select(self):
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('book-list'), data={'page_size': 5})
+        self.assertEqual(len(resp.data['results']), 5)
+
+    def test_mylist_runs_auth_and_one_joined_select(self):
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('book-mylist'), HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(len(resp.data), 10)
+
+    def test_detail_runs_auth_and_one_joined_select(self):
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('book-detail', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(resp.data['author_pseudonym'], self.author.pseudonym)
+
+    def test_unpublish_runs_auth_one_update_and_one_stats_update(self):
+        # The savepoint around the update and the locked read of the book's old values, then
+        # the UPDATE of the author's stats.
+        with self.assertNumQueries(6):
+            self.client.patch(reverse('book-unpublish', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+
+    def test_query_count_header(self):
+        middleware = ['wookie.db.middleware.QueryCountMiddleware', *settings.MIDDLEWARE]
+        with self.settings(MIDDLEWARE=middleware):
+            # A new client, the middleware of `self.client` is already loaded.
+            client = self.client_class()
+            resp = client.get(reverse('book-detail', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+            self.assertEqual(resp['X-Query-Count'], '2')
+            resp = client.get(reverse('book-list'), data={'page_size': 5})
+            self.assertEqual(resp['X-Query-Count'], '2')
+
+    def test_read_endpoints_do_not_repeat_queries(self):
+        with assert_no_repeated_queries():
+            self.client.get(reverse('book-list'))
+        with assert_no_repeated_queries():
+            self.client.get(reverse('book-mylist'), HTTP_AUTHORIZATION=self.token)
+        with assert_no_repeated_queries():
+            self.client.get(reverse('book-detail', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+
+    def test_repeated_queries_are_caught(self):
+        with self.assertRaisesRegex(AssertionError, '20x SELECT .* FROM "author_author"'):
+            with assert_no_repeated_queries():
+                [book.author.pseudonym for book in Book.objects.all()]
+
+    def test_sampled_requests_log_repeated_and_slow_queries(self):
+        middleware = ['wookie.db.middleware.QueryInspectionMiddleware', *settings.MIDDLEWARE]
+        with self.settings(MIDDLEWARE=middleware, DATABASE_QUERY_SAMPLE_RATE=1, DATABASE_SLOW_QUERY_THRESHOLD=0,
+                           DATABASE_REPEATED_QUERY_THRESHOLD=1):
+            client = self.client_class()
+            with self.assertLogs('wookie.db.inspection', 'WARNING') as logs:
+                client.get(reverse('book-detail', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+        self.assertTrue(any(line.startswith('WARNING:wookie.db.inspection:Slow query') and 'GET book-detail' in line
+                            for line in logs.output))
+        self.assertTrue(any('Query run 1 times in GET book-detail' in line for line in logs.output))
+
+        with self.settings(MIDDLEWARE=middleware, DATABASE_QUERY_SAMPLE_RATE=0, DATABASE_SLOW_QUERY_THRESHOLD=0):
+            client = self.client_class()
+            with self.assertNoLogs('wookie.db.inspection'):
+                client.get(reverse('book-detail', kwargs={'pk': self.book.id}), HTTP_AUTHORIZATION=self.token)
+
+    def test_select_does_not_join_author(self):
+        sql = str(Book.objects.for_serializer().query)
+        self.assertIn('"book_book"."author_pseudonym"', sql)
+        self.assertNotIn('"author_author"', sql)
+        self.assertNotIn('"book_book"."search_vector"', sql)
+
+    def test_pseudonym_filter_does_not_join_author(self):
+        sql = str(BookFilter({'author_pseudonym': 'samsami'}, queryset=Book.objects.all()).qs.query)
+        self.assertNotIn('"author_author"', sql)
+
+
+# Tests for `?stream=true` on the book-list and book-mylist paths
+class StreamBookViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.get_token()
+        for _ in range(5):
+            baker.make('book', author=self.author, published=True)
+        baker.make('book', author=self.author, published=True, title='Wookiee <Tales> & "Songs"',
+                   cover_image='images/book-covers/tales.gif')
+        for _ in range(5):
+            baker.make('book', published=True)
+
+    def assertStreamsIdentically(self, url, **extra):
+        buffered = self.client.get(url, **extra)
+        cache.clear()
+        streamed = self.client.get(url, data={'stream': 'true'}, **extra)
+
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(streamed.status_code, status.HTTP_200_OK)
+        self.assertEqual(streamed['Content-Type'], buffered['Content-Type'])
+        self.assertEqual(b''.join(streamed.streaming_content), buffered.content)
+
+    def test_list_streams_json(self):
+        self.assertStreamsIdentically(reverse('book-list'), HTTP_ACCEPT='application/json')
+
+    def test_list_streams_xml_chosen_by_content_type(self):
+        self.assertStreamsIdentically(reverse('book-list'), content_type='application/xml')
+        resp = self.client.get(reverse('book-list'), data={'stream': 'true'}, content_type='application/xml')
+        self.assertTrue('application/xml' in resp['Content-Type'])
+
+    def test_mylist_streams_json(self):
+        self.assertStreamsIdentically(reverse('book-mylist'), HTTP_AUTHORIZATION=self.token)
+
+    def test_mylist_streams_xml(self):
+        self.assertStreamsIdentically(reverse('book-mylist'), HTTP_AUTHORIZATION=self.token,
+                                      HTTP_ACCEPT='application/xml')
+
+    def test_browsable_api_is_not_streamed(self):
+        resp = self.client.get(reverse('book-list'), data={'stream': 'true'}, HTTP_ACCEPT='text/html')
+        self.assertFalse(resp.streaming)
+        self.assertTrue('text/html' in resp['Content-Type'])
+
+
+# Tests for MessagePack requests and responses on the book paths
+class MessagePackBookViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.get_token()
+        for _ in range(5):
+            baker.make('book', author=self.author, published=True)
+
+    def test_list_response_is_msgpack_when_accepted(self):
+        json_resp = self.client.get(reverse('book-list'))
+        resp = self.client.get(reverse('book-list'), HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue('application/msgpack' in resp['Content-Type'])
+        self.assertEqual(msgpack.unpackb(resp.content), json_resp.json())
+        self.assertLess(len(resp.content), len(json_resp.content))
+
+    def test_list_response_is_msgpack_when_x_msgpack_is_accepted(self):
+        resp = self.client.get(reverse('book-list'), HTTP_ACCEPT='application/x-msgpack')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp['Content-Type'].startswith('application/x-msgpack'))
+        self.assertEqual(len(msgpack.unpackb(resp.content)), 5)
+
+    def test_mylist_response_is_msgpack_when_content_type_is_msgpack(self):
+        resp = self.client.get(reverse('book-mylist'), HTTP_AUTHORIZATION=self.token,
+                               content_type='application/msgpack')
+        self.assertTrue('application/msgpack' in resp['Content-Type'])
+        self.assertEqual(len(msgpack.unpackb(resp.content)), 5)
+
+    def test_create_book_from_msgpack_body(self):
+        params = {'title': 'Python Distilled', 'description': 'This is a book', 'price': '12.50', 'published': True}
+        resp = self.client.post(reverse('book-create'), data=msgpack.packb(params), HTTP_AUTHORIZATION=self.token,
+                                content_type='application/msgpack')
+        data = msgpack.unpackb(resp.content)
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(data, BookSerializer(Book.objects.get(id=data['id'])).data)
+
+    def test_create_book_from_x_msgpack_body(self):
+        params = {'title': 'Python Distilled', 'description': 'This is a book', 'price': '12.50', 'published': True}
+        resp = self.client.post(reverse('book-create'), data=msgpack.packb(params), HTTP_AUTHORIZATION=self.token,
+                                content_type='application/x-msgpack')
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(resp.content)['title'], 'Python Distilled')
+
+    def test_create_book_rejects_malformed_msgpack(self):
+        resp = self.client.post(reverse('book-create'), data=b'\xc1', HTTP_AUTHORIZATION=self.token,
+                                content_type='application/msgpack')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkBookViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.get_token()
+        self.rows = [{'title': f'Book {i}', 'description': f'Description {i}', 'price': f'{i}.50',
+                      'published': bool(i % 2)} for i in range(1, 6)]
+
+    def import_books(self, data, content_type):
+        return self.client.post(reverse('book-import'), data=data, HTTP_AUTHORIZATION=self.token,
+                                content_type=content_type)
+
+    def test_import_json_lines(self):
+        data = '\n'.join(json.dumps(row) for row in self.rows) + '\n\n'
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.import_books(data, 'application/x-ndjson')
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data, {'created': 5})
+        books = Book.objects.filter(author=self.author).order_by('id')
+        self.assertEqual([(book.title, str(book.price), book.published) for book in books],
+                         [(row['title'], row['price'], row['published']) for row in self.rows])
+        # The imported books are indexed and the cached list is invalidated like after a create.
+        resp = self.client.get(reverse('book-list'), {'q': 'Book 3'})
+        self.assertEqual([book['title'] for book in resp.json()], ['Book 3'])
+
+    def test_import_csv_in_batches(self):
+        data = 'title,description,price,published,id\n' + ''.join(
+            f'{row["title"]},"{row["description"]}, in CSV",{row["price"]},{row["published"]},99\n'
+            for row in self.rows)
+        with self.settings(BOOK_IMPORT_BATCH_SIZE=2):
+            resp = self.import_books(data, 'text/csv')
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data, {'created': 5})
+        self.assertEqual(Book.objects.filter(author=self.author, description__endswith=', in CSV').count(), 5)
+
+    def test_import_reports_invalid_rows_and_creates_nothing(self):
+        self.rows[1]['price'] = 'free'
+        self.rows[3].pop('title')
+        with self.settings(BOOK_IMPORT_BATCH_SIZE=2):
+            resp = self.import_books(json.dumps(self.rows), 'application/json')
+
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([(error['row'], list(error['errors'])) for error in resp.data['errors']],
+                         [(2, ['price']), (4, ['title'])])
+        self.assertFalse(Book.objects.exists())
+
+    def test_import_rejects_malformed_json_lines(self):
+        resp = self.import_books('{"title": "Book"}\n{"title"\n', 'application/x-ndjson')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('line 2', str(resp.data['detail']))
+        self.assertFalse(Book.objects.exists())
+
+    def test_import_rejects_bodies_that_are_not_rows(self):
+        for body in ('5', '"Python Distilled"', 'null', 'true'):
+            resp = self.import_books(body, 'application/json')
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, body)
+        self.assertFalse(Book.objects.exists())
+
+    def test_import_rejects_too_many_rows(self):
+        with self.settings(BOOK_IMPORT_MAX_ROWS=4, BOOK_IMPORT_BATCH_SIZE=3):
+            resp = self.import_books(json.dumps(self.rows), 'application/json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Book.objects.exists())
+
+    def test_export_streams_own_books_as_json_lines(self):
+        baker.make('book', _quantity=3, author=self.author)
+        baker.make('book', author=USER_MODEL.objects.create_user(username='other', pseudonym='other'))
+
+        resp = self.client.get(reverse('book-export'), HTTP_AUTHORIZATION=self.token)
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp['Content-Type'].startswith('application/x-ndjson'))
+        self.assertEqual(resp['Content-Disposition'], 'attachment; filename="books.jsonl"')
+        books = Book.objects.filter(author=self.author).order_by('id')
+        self.assertEqual([json.loads(line) for line in lines], json.loads(JSONRenderer().render(
+            BookSerializer(books, many=True).data)))
+
+    def test_export_csv_can_be_imported_back(self):
+        self.import_books(json.dumps(self.rows), 'application/json')
+
+        resp = self.client.get(reverse('book-export'), {'format': 'csv'}, HTTP_AUTHORIZATION=self.token)
+        data = b''.join(resp.streaming_content)
+        self.assertTrue(resp['Content-Type'].startswith('text/csv'))
+        self.assertTrue(data.startswith(b'id,title,author_pseudonym,description,cover_image,cover_thumbnails,'))
+
+        resp = self.import_books(data, 'text/csv')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Book.objects.filter(author=self.author).count(), 10)
+
+
+class BulkActionBookViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.get_token()
+        self.books = baker.make('book', _quantity=4, author=self.author, published=True, price=10)
+        self.other_book = baker.make('book', author=USER_MODEL.objects.create_user(username='other', pseudonym='o'),
+                                     published=True)
+
+    def post(self, name, data):
+        return self.client.post(reverse(name), data=data, format='json', HTTP_AUTHORIZATION=self.token)
+
+    def test_unpublish_by_ids_reports_missing_and_foreign_ids(self):
+        ids = [self.books[0].id, self.books[1].id, self.other_book.id, 99999]
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.post('book-bulk-unpublish', {'ids': ids})
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, {'updated': 2, 'missing': [self.other_book.id, 99999]})
+        self.assertEqual(set(Book.objects.filter(published=False).values_list('id', flat=True)),
+                         {self.books[0].id, self.books[1].id})
+        self.assertEqual(len(self.client.get(reverse('book-list')).json()), 3)
+
+    def test_publish_by_filter(self):
+        Book.objects.update(published=False)
+        cheap = baker.make('book', author=self.author, published=False, price=2)
+
+        resp = self.post('book-bulk-publish', {'filter': {'max_price': '5'}})
+
+        self.assertEqual(resp.data, {'updated': 1, 'missing': []})
+        self.assertEqual(list(Book.objects.filter(published=True).values_list('id', flat=True)), [cheap.id])
+
+    def test_delete_by_ids_releases_covers_and_index(self):
+        cover = SimpleUploadedFile(self.file_name, self.small_gif, content_type='image/gif')
+        covered = [Book.objects.create(author=self.author, title='Python Distilled', description='Python book',
+                                       price=1, cover_image=cover) for _ in range(2)]
+        ids = [book.id for book in self.books + covered]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.post('book-bulk-delete', {'ids': ids + [self.other_book.id]})
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, {'deleted': 6, 'missing': [self.other_book.id]})
+        self.assertEqual(list(Book.objects.values_list('id', flat=True)), [self.other_book.id])
+        self.assertFalse(CoverBlob.objects.exists())
+        self.assertFalse(cover_storage.exists(covered[0].cover_image.name))
+        self.assertEqual(self.client.get(reverse('book-list'), {'q': 'Python'}).json(), [])
+
+    def test_delete_by_filter_runs_the_same_queries_for_any_number_of_books(self):
+        self.post('book-bulk-delete', {'ids': [99999]})  # caches the authenticated user
+        with CaptureQueriesContext(connection) as few:
+            resp = self.post('book-bulk-delete', {'filter': {'max_price': '100000000'}})
+        self.assertEqual(resp.data, {'deleted': 4, 'missing': []})
+
+        baker.make('book', _quantity=40, author=self.author)
+        with CaptureQueriesContext(connection) as many:
+            resp = self.post('book-bulk-delete', {'filter': {'max_price': '100000000'}})
+        self.assertEqual(resp.data, {'deleted': 40, 'missing': []})
+        self.assertEqual(len(many), len(few))
+        self.assertTrue(Book.objects.filter(id=self.other_book.id).exists())
+
+    def test_queryset_delete_is_one_delete_and_signals_once(self):
+        received = []
+
+        def receiver(sender, books, **kwargs):
+            received.append(books)
+
+        books_deleted.connect(receiver, sender=Book)
+        self.addCleanup(books_deleted.disconnect, receiver, sender=Book)
+        with CaptureQueriesContext(connection) as queries:
+            Book.objects.filter(author=self.author).delete()
+
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('DELETE FROM "book_book"')]), 1)
+        self.assertEqual([len(books) for books in received], [4])
+        self.assertEqual(AuthorStats.objects.get(author=self.author).books, 0)
+
+    def test_rejects_ambiguous_or_empty_selection(self):
+        for data in ({'ids': [1], 'filter': {'title': 'x'}}, {}, {'ids': []}, {'filter': {}},
+                     {'filter': {'min_price': 'cheap'}}, {'filter': {'titel': 'x'}}, {'filter': {'facets': 'true'}},
+                     {'filter': {'title': '', 'facets': 'true'}}, {'filter': {'title': ''}}):
+            resp = self.post('book-bulk-delete', data)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, data)
+        self.assertEqual(Book.objects.count(), 5)
+
+
+# Tests for `?facets=true` on path('', BookListView.as_view(), name='book-list')
+class FacetBookListViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        other = USER_MODEL.objects.create_user(username='other', pseudonym='o.author')
+        for price in (5, 10, 30, 30, 120):
+            baker.make('book', author=self.author, published=True, price=price, title='Python')
+        baker.make('book', author=other, published=True, price=60, title='Django')
+        baker.make('book', author=other, published=False, price=60, title='Python')
+
+    def count_list_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse('book-list'), data=params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp, len(queries)
+
+    def test_response_has_no_facets_by_default(self):
+        resp = self.client.get(reverse('book-list'))
+        self.assertIsInstance(resp.data, list)
+
+    def test_facets_of_the_whole_list(self):
+        resp = self.client.get(reverse('book-list'), data={'facets': 'true'})
+
+        self.assertEqual(len(resp.data['results']), 6)
+        self.assertEqual(resp.data['facets'], {
+            'price': [{'min': None, 'max': '10.00', 'count': 1}, {'min': '10.00', 'max': '25.00', 'count': 1},
+                      {'min': '25.00', 'max': '50.00', 'count': 2}, {'min': '50.00', 'max': '100.00', 'count': 1},
+                      {'min': '100.00', 'max': None, 'count': 1}],
+            'author_pseudonym': [{'value': 'h.samsami', 'count': 5}, {'value': 'o.author', 'count': 1}],
+            'published': [{'value': True, 'count': 6}],
+        })
+
+    def test_facets_follow_the_filters_not_the_page(self):
+        resp = self.client.get(reverse('book-list'), data={'facets': 'true', 'title': 'python', 'min_price': 10,
+                                                           'page_size': 2})
+
+        self.assertEqual(len(resp.data['results']), 2)
+        self.assertIsNotNone(resp.data['next'])
+        facets = resp.data['facets']
+        self.assertEqual([bucket['count'] for bucket in facets['price']], [0, 1, 2, 0, 1])
+        self.assertEqual(facets['author_pseudonym'], [{'value': 'h.samsami', 'count': 4}])
+
+    def test_facets_run_a_single_query(self):
+        _, without = self.count_list_queries(title='python')
+        cache.clear()
+        _, with_facets = self.count_list_queries(title='python', facets='true')
+        self.assertEqual(with_facets, without + 1)
+
+    @mock.patch.object(settings, 'BOOK_FACET_AUTHORS', 1)
+    def test_author_facet_is_limited(self):
+        resp = self.client.get(reverse('book-list'), data={'facets': 'true'})
+        self.assertEqual(resp.data['facets']['author_pseudonym'], [{'value': 'h.samsami', 'count': 5}])
+
+    def test_facets_of_the_whole_list_are_shared_by_its_pages(self):
+        self.client.get(reverse('book-list'), data={'facets': 'true'})
+        _, without = self.count_list_queries(page_size=2)
+        resp, with_facets = self.count_list_queries(page_size=3, facets='true')
+
+        self.assertEqual(with_facets, without)
+        self.assertEqual(resp.data['facets']['published'], [{'value': True, 'count': 6}])
+
+    def test_cached_facets_are_invalidated_by_writes(self):
+        self.client.get(reverse('book-list'), data={'facets': 'true'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.filter(price=120).get().delete()
+
+        resp = self.client.get(reverse('book-list'), data={'facets': 'true', 'page_size': 2})
+        self.assertEqual(resp.data['facets']['price'][-1]['count'], 0)
+
+
+# Tests for path('stats/', views.book_stats, name='book-stats')
+class StatsBookViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.get_token()
+        self.books = baker.make('book', _quantity=3, author=self.author, published=True, price=10)
+        self.other_book = baker.make('book', author=USER_MODEL.objects.create_user(username='other', pseudonym='o'),
+                                     published=True, price=40)
+
+    def assertStatsAreCurrent(self):
+        expected = count_books(Book.objects.values_list('author_id', 'published', 'price'))
+        stats = {row.pop('author_id'): row for row in AuthorStats.objects.values('author_id', *COUNTED_FIELDS)}
+        self.assertLessEqual(set(expected), set(stats))
+        for author_id, row in stats.items():
+            self.assertEqual(row, {field: expected[author_id][field] for field in COUNTED_FIELDS}, author_id)
+
+    def test_catalog_and_author_stats(self):
+        resp = self.client.get(reverse('book-stats'), HTTP_AUTHORIZATION=self.token)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json(), {
+            'catalog': {'books': 4, 'published_books': 4, 'published_ratio': 1.0, 'min_price': '10.00',
+                        'max_price': '40.00', 'average_price': '17.50'},
+            'author': {'books': 3, 'published_books': 3, 'published_ratio': 1.0, 'min_price': '10.00',
+                       'max_price': '10.00', 'average_price': '10.00'},
+        })
+
+    def test_anonymous_clients_only_get_the_catalog(self):
+        # The sums of the author rows and the price range, then nothing until the next write.
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('book-stats'))
+        self.assertEqual(list(resp.json()), ['catalog'])
+        with self.assertNumQueries(0):
+            self.client.get(reverse('book-stats'))
+
+    def test_authors_without_books(self):
+        Book.objects.filter(author=self.author).delete()
+        resp = self.client.get(reverse('book-stats'), HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(resp.json()['author'], {'books': 0, 'published_books': 0, 'published_ratio': None,
+                                                 'min_price': None, 'max_price': None, 'average_price': None})
+
+    def test_stats_follow_every_write(self):
+        auth = {'HTTP_AUTHORIZATION': self.token}
+        book = {'title': 'Python Distilled', 'description': 'Python', 'price': 5, 'published': True}
+        resp = self.client.post(reverse('book-create'), data=book, **auth)
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertStatsAreCurrent()
+
+        book_id = resp.data['id']
+        writes = [
+            ('put', 'book-update', {'pk': book_id}, {**book, 'price': 50}, None),
+            ('patch', 'book-unpublish', {'pk': self.books[0].id}, None, None),
+            ('post', 'book-bulk-publish', {}, {'ids': [book_id, self.books[0].id]}, 'json'),
+            ('post', 'book-import', {}, [{**book, 'title': 'Imported', 'price': 1}], 'json'),
+            ('delete', 'book-delete', {'pk': book_id}, None, None),
+            ('post', 'book-bulk-delete', {}, {'filter': {'max_price': '5'}}, 'json'),
+        ]
+        for method, name, kwargs, data, format in writes:
+            with self.subTest(name):
+                resp = getattr(self.client, method)(reverse(name, kwargs=kwargs), data=data, format=format, **auth)
+                self.assertLess(resp.status_code, 300, resp.data)
+                self.assertStatsAreCurrent()
+        self.assertEqual(self.client.get(reverse('book-stats')).json()['catalog']['min_price'], '10.00')
+
+    def test_bulk_unpublish_by_pseudonym(self):
+        # `author_pseudonym` only matches published books, so none match anymore after the UPDATE.
+        resp = self.client.post(reverse('book-bulk-unpublish'), data={'filter': {'author_pseudonym': 'samsami'}},
+                                format='json', HTTP_AUTHORIZATION=self.token)
+
+        self.assertEqual(resp.data, {'updated': 3, 'missing': []})
+        self.assertStatsAreCurrent()
+        self.assertEqual(AuthorStats.objects.get(author=self.author).published_books, 0)
+        stats = self.client.get(reverse('book-stats')).json()['catalog']
+        self.assertEqual((stats['published_books'], stats['max_price']), (1, '40.00'))
+
+    def test_writes_only_touch_their_author_stats(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(reverse('book-unpublish', kwargs={'pk': self.books[0].id}),
+                              HTTP_AUTHORIZATION=self.token)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "book_authorstats"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(AuthorStats.objects.get(author=self.other_book.author).published_books, 1)
+
+    def test_book_moved_to_another_author(self):
+        self.books[0].author = self.other_book.author
+        self.books[0].save()
+
+        self.assertStatsAreCurrent()
+        self.assertEqual(AuthorStats.objects.get(author=self.author).books, 2)
+
+
+class AsyncBookViewTests(BookViewTests):
+    def setUp(self):
+        self.create_author()
+        self.get_token()
+        self.books = baker.make('book', _quantity=3, author=self.author, published=True)
+
+    async def test_list_is_served_by_the_async_client(self):
+        resp = await self.async_client.get(reverse('book-list'), {'page_size': 2})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.json()['results']), 2)
+        self.assertIsNotNone(resp.json()['next'])
+
+        # The second request is answered from the cache.
+        cached = await self.async_client.get(reverse('book-list'), {'page_size': 2})
+        self.assertEqual(cached.json(), resp.json())
+        self.assertEqual(cached['ETag'], resp['ETag'])
+
+    async def test_mylist_and_detail_are_served_by_the_async_client(self):
+        # The async client of Django 4.1 takes header names as they are, without the HTTP_ prefix.
+        resp = await self.async_client.get(reverse('book-mylist'), AUTHORIZATION=self.token)
+        self.assertEqual(len(resp.json()), 3)
+
+        resp = await self.async_client.get(reverse('book-detail', args=[self.books[0].id]),
+                                           AUTHORIZATION=self.token)
+        self.assertEqual(resp.json()['id'], self.books[0].id)
+
+        resp = await self.async_client.get(reverse('book-detail', args=[99999]), AUTHORIZATION=self.token)
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_views_still_authenticate(self):
+        resp = await self.async_client.get(reverse('book-mylist'), AUTHORIZATION='Bearer invalid')
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
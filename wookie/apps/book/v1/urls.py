@@ -6,8 +6,14 @@ urlpatterns = [
     path('', BookListView.as_view(), name='book-list'),
     path('mylist/', views.my_books, name='book-mylist'),
     path('detail/<int:pk>/', views.book_detail, name='book-detail'),
+    path('stats/', views.book_stats, name='book-stats'),
     path('create/', views.book_create, name='book-create'),
     path('update/<int:pk>/', views.book_update, name='book-update'),
     path('delete/<int:pk>/', views.book_delete, name='book-delete'),
-    path('unpublish/<int:pk>/', views.book_unpublish, name='book-unpublish')
+    path('unpublish/<int:pk>/', views.book_unpublish, name='book-unpublish'),
+    path('import/', views.book_import, name='book-import'),
+    path('export/', views.book_export, name='book-export'),
+    path('bulk/publish/', views.book_bulk_publish, name='book-bulk-publish'),
+    path('bulk/unpublish/', views.book_bulk_unpublish, name='book-bulk-unpublish'),
+    path('bulk/delete/', views.book_bulk_delete, name='book-bulk-delete'),
 ]
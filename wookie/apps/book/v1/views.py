@@ -1,83 +1,201 @@
+from functools import partial
+
+from adrf.decorators import api_view as async_api_view
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django_filters import rest_framework as filters
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, status, parsers
-from rest_framework.decorators import api_view, authentication_classes, permission_classes, parser_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, parser_classes, \
+    renderer_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from wookie.apps.author.authentication import CachedJWTAuthentication
+from wookie.apps.book.bulk import delete_books, get_import_rows, get_missing_ids, import_books, select_books, \
+    set_published
+from wookie.apps.book.cache import facets_cache_key, list_cache_key, stats_cache_key
+from wookie.apps.book.conditional import aget_list_state, get_list_validators, get_not_modified_response, \
+    get_validators, set_validators
 from wookie.apps.book.filters import BookFilter
+from wookie.apps.book.images import schedule_cover_processing
 from wookie.apps.book.models import Book
-from wookie.apps.book.serialisers import BookSerializer
+from wookie.apps.book.pagination import BookKeysetPagination
+from wookie.apps.book.serialisers import BookBulkSerializer, BookReadSerializer, BookSerializer, BookStatsSerializer
+from wookie.apps.book.stats import aget_author_stats, aget_catalog_stats
+from wookie.apps.book.streaming import get_streaming_response, is_streaming_requested
+from wookie.parsers import CSVParser, JSONLinesParser, LegacyMessagePackParser, MessagePackParser
+from wookie.renderers import CSVRenderer, JSONLinesRenderer
 
 
-class BookListView(generics.ListAPIView):
-    queryset = Book.objects.prefetch_related('author').filter(published=True).all()
+class BookListView(generics.ListAPIView, AsyncAPIView):
+    """
+    The public book list. Served asynchronously: the ORM work goes through Django's async
+    queryset API, so an ASGI worker keeps serving other requests while a query runs.
+    """
+    queryset = Book.objects.for_serializer().filter(published=True)
     serializer_class = BookSerializer
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = BookFilter
+    pagination_class = BookKeysetPagination
     permission_classes = (AllowAny,)
 
+    async def get(self, request, *args, **kwargs):
+        return await self.list(request, *args, **kwargs)
 
-@api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+    async def list(self, request, *args, **kwargs):
+        if is_streaming_requested(request):
+            return await self.stream(request)
+
+        # Resolve the key before querying so a write that lands mid-request bumps the
+        # version past the entry stored below instead of hiding behind it. Clients pinned to
+        # the primary after a write skip the cache, which may hold pages read from a replica.
+        key = await sync_to_async(list_cache_key)(request)
+        if not getattr(request, 'db_pinned', False) and (cached := await cache.aget(key)) is not None:
+            state, data = cached
+            validators = get_list_validators(request, *state)
+            if (response := get_not_modified_response(request, validators)) is not None:
+                return response
+            return set_validators(Response(data, status=status.HTTP_200_OK), validators)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        state = await aget_list_state(queryset)
+        validators = get_list_validators(request, *state)
+        if (response := get_not_modified_response(request, validators)) is not None:
+            return response
+
+        rows = queryset.values_for_serializer()
+        if (page := await self.paginator.apaginate_queryset(rows, request, view=self)) is not None:
+            serializer = BookReadSerializer(page, many=True, context=self.get_serializer_context())
+            response = self.get_paginated_response(serializer.data)
+        else:
+            rows = [row async for row in rows]
+            serializer = BookReadSerializer(rows, many=True, context=self.get_serializer_context())
+            response = Response(serializer.data, status=status.HTTP_200_OK)
+        if BookFilter.wants_facets(request.query_params):
+            data = response.data if isinstance(response.data, dict) else {'results': response.data}
+            response.data = {**data, 'facets': await self.get_facets(request, queryset)}
+        await cache.aset(key, (state, response.data), settings.BOOK_LIST_CACHE_TIMEOUT)
+        return set_validators(response, validators)
+
+    async def get_facets(self, request, queryset):
+        """
+        The facets of the filtered books. Those of the whole list are shared by all its pages
+        and cached until the next write.
+        """
+        rows = BookFilter.get_facet_rows(queryset)
+        if BookFilter.is_filtering(request.query_params) or getattr(request, 'db_pinned', False):
+            return BookFilter.get_facets([row async for row in rows])
+        key = await sync_to_async(facets_cache_key)()
+        if (facets := await cache.aget(key)) is None:
+            facets = BookFilter.get_facets([row async for row in rows])
+            await cache.aset(key, facets, settings.BOOK_LIST_CACHE_TIMEOUT)
+        return facets
+
+    async def stream(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        validators = get_list_validators(request, *await aget_list_state(queryset))
+        if (response := get_not_modified_response(request, validators)) is not None:
+            return response
+        response = get_streaming_response(request, queryset.values_for_serializer(), self.get_serializer_context())
+        return set_validators(response, validators)
+
+
+@async_api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
-def my_books(request):
-    books = list(Book.objects.prefetch_related('author').filter(author=request.user).all())
+async def my_books(request):
+    books = Book.objects.values_for_serializer().filter(author=request.user)
+    if is_streaming_requested(request):
+        if await books.aexists():
+            return get_streaming_response(request, books)
+        return Response('Book Not Found', status=status.HTTP_404_NOT_FOUND)
+
+    books = [book async for book in books]
     if len(books) > 0:
-        serializer = BookSerializer(books, many=True)
+        serializer = BookReadSerializer(books, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     return Response('Book Not Found', status=status.HTTP_404_NOT_FOUND)
 
 
-@api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@async_api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
-def book_detail(request, pk):
+async def book_detail(request, pk):
     try:
-        book = Book.objects.prefetch_related('author').filter(author=request.user).get(id=pk)
+        book = await Book.objects.values_for_serializer().filter(author=request.user).aget(id=pk)
     except Book.DoesNotExist:
         return Response('Book Not Found', status=status.HTTP_404_NOT_FOUND)
-    serializer = BookSerializer(book)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    validators = get_validators(request, book['updated_at'], book['id'], book['author_pseudonym'])
+    if (response := get_not_modified_response(request, validators)) is not None:
+        return response
+    serializer = BookReadSerializer(book)
+    return set_validators(Response(serializer.data, status=status.HTTP_200_OK), validators)
+
+
+@async_api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([AllowAny])
+async def book_stats(request):
+    """
+    Book counts and published price ranges of the whole catalog and, for an authenticated
+    author, of their own books. The counts are read from the per-author rows every write
+    moves, the price ranges from the published price index. The catalog's are cached until
+    the next write.
+    """
+    key = await sync_to_async(stats_cache_key)()
+    if (catalog := await cache.aget(key)) is None:
+        catalog = await aget_catalog_stats()
+        await cache.aset(key, catalog, settings.BOOK_LIST_CACHE_TIMEOUT)
+    data = {'catalog': BookStatsSerializer(catalog).data}
+    if request.user.is_authenticated:
+        data['author'] = BookStatsSerializer(await aget_author_stats(request.user.pk)).data
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @swagger_auto_schema(method='post', request_body=BookSerializer)
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
-@parser_classes([parsers.MultiPartParser, parsers.FormParser])
+@parser_classes([parsers.MultiPartParser, parsers.FormParser, MessagePackParser, LegacyMessagePackParser])
 def book_create(request):
     serializer = BookSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    serializer.save(author=request.user)
+    # The author's stats are moved by the post_save signal, in the same transaction.
+    with transaction.atomic():
+        book = serializer.save(author=request.user)
+    if serializer.validated_data.get('cover_image'):
+        transaction.on_commit(partial(schedule_cover_processing, book.id))
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 @swagger_auto_schema(method='put', request_body=BookSerializer)
 @api_view(['PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
-@parser_classes([parsers.MultiPartParser, parsers.FormParser])
+@parser_classes([parsers.MultiPartParser, parsers.FormParser, MessagePackParser, LegacyMessagePackParser])
 def book_update(request, pk):
     try:
-        book = Book.objects.prefetch_related('author').filter(author=request.user).get(id=pk)
+        book = Book.objects.filter(author=request.user).get(id=pk)
     except Book.DoesNotExist:
         return Response('Book Not Found', status=status.HTTP_404_NOT_FOUND)
     serializer = BookSerializer(instance=book, data=request.data)
     serializer.is_valid(raise_exception=True)
-    serializer.save(author=request.user)
+    with transaction.atomic():
+        book = serializer.save(author=request.user)
+    if serializer.validated_data.get('cover_image'):
+        transaction.on_commit(partial(schedule_cover_processing, book.id))
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(['PATCH'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def book_unpublish(request, pk):
-    updated = Book.objects.prefetch_related('author')\
-        .filter(author=request.user)\
-        .filter(id=pk)\
-        .update(published=False)
+    updated = set_published(Book.objects.filter(author=request.user).filter(id=pk), False)
     if updated:
         return Response('Book Unpublished', status=status.HTTP_200_OK)
     else:
@@ -85,12 +203,81 @@ def book_unpublish(request, pk):
 
 
 @api_view(['DELETE'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def book_delete(request, pk):
     try:
-        book = Book.objects.prefetch_related('author').filter(author=request.user).filter(id=pk).get()
+        book = Book.objects.filter(author=request.user).filter(id=pk).get()
     except Book.DoesNotExist:
         return Response('Book Not Found', status=status.HTTP_404_NOT_FOUND)
     book.delete()
     return Response('Book Deleted', status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONLinesParser, CSVParser, parsers.JSONParser, MessagePackParser, LegacyMessagePackParser])
+def book_import(request):
+    """
+    Create many books at once from JSON lines, CSV (with a header row) or a JSON/MessagePack
+    list. Either every row is imported or none is and the invalid rows are reported.
+    """
+    books, errors = import_books(get_import_rows(request.data), request.user)
+    if errors:
+        return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'created': len(books)}, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONLinesRenderer, CSVRenderer])
+def book_export(request):
+    """
+    Stream all books of the authenticated user as JSON lines or CSV (`?format=csv`).
+    """
+    books = Book.objects.values_for_serializer().filter(author=request.user).order_by('id')
+    response = get_streaming_response(request, books)
+    response.headers['Content-Disposition'] = f'attachment; filename="books.{request.accepted_renderer.format}"'
+    return response
+
+
+def bulk_set_published(request, published):
+    serializer = BookBulkSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data.get('ids')
+    books = select_books(request.user, **serializer.validated_data)
+    updated = set_published(books, published)
+    missing = []
+    if ids is not None and updated < len(set(ids)):
+        missing = get_missing_ids(ids, books.values_list('id', flat=True))
+    return Response({'updated': updated, 'missing': missing}, status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(method='post', request_body=BookBulkSerializer)
+@api_view(['POST'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def book_bulk_publish(request):
+    return bulk_set_published(request, True)
+
+
+@swagger_auto_schema(method='post', request_body=BookBulkSerializer)
+@api_view(['POST'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def book_bulk_unpublish(request):
+    return bulk_set_published(request, False)
+
+
+@swagger_auto_schema(method='post', request_body=BookBulkSerializer)
+@api_view(['POST'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def book_bulk_delete(request):
+    serializer = BookBulkSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    deleted = delete_books(select_books(request.user, **serializer.validated_data))
+    missing = get_missing_ids(serializer.validated_data.get('ids', []), deleted)
+    return Response({'deleted': len(deleted), 'missing': missing}, status=status.HTTP_200_OK)
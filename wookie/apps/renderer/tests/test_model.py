@@ -1,3 +1,4 @@
+import msgpack
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -7,6 +8,7 @@ class RendererTests(APITestCase):
     def setUp(self):
         self.json_type = 'application/json'
         self.xml_type = 'application/xml'
+        self.msgpack_type = 'application/msgpack'
         self.url = reverse('renderer')
 
     def test_response_default_content_type_is_json(self):
@@ -34,3 +36,12 @@ class RendererTests(APITestCase):
         resp = self.client.get(self.url, content_type=self.xml_type)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertTrue(self.xml_type in resp['Content-Type'])
+
+    def test_msgpack_response_when_content_type_is_msgpack(self):
+        """
+        Ensure when Content-Type in the header request is application/msgpack then the response is MessagePack too.
+        """
+        resp = self.client.get(self.url, content_type=self.msgpack_type)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.msgpack_type in resp['Content-Type'])
+        self.assertEqual(msgpack.unpackb(resp.content), 'ok')
@@ -0,0 +1,57 @@
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from wookie.negotiation import CustomContentNegotiation
+from wookie.utils import LRUCache
+
+
+class CustomContentNegotiationTests(APITestCase):
+    def setUp(self):
+        self.url = reverse('renderer')
+        CustomContentNegotiation.cache.clear()
+
+    def test_negotiation_is_memoized(self):
+        with mock.patch.object(CustomContentNegotiation, 'negotiate',
+                               wraps=CustomContentNegotiation().negotiate) as negotiate:
+            for _ in range(3):
+                resp = self.client.get(self.url, content_type='application/xml')
+                self.assertTrue('application/xml' in resp['Content-Type'])
+            resp = self.client.get(self.url, content_type='application/json')
+            self.assertTrue('application/json' in resp['Content-Type'])
+
+        self.assertEqual(negotiate.call_count, 2)
+
+    def test_accept_header_is_part_of_the_key(self):
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/xml')
+        self.assertTrue('application/xml' in resp['Content-Type'])
+        resp = self.client.get(self.url, HTTP_ACCEPT='application/json')
+        self.assertTrue('application/json' in resp['Content-Type'])
+
+    def test_content_type_parameters_are_ignored(self):
+        resp = self.client.get(self.url, content_type='application/xml; charset=utf-8')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue('application/xml' in resp['Content-Type'])
+
+    def test_multipart_boundaries_share_a_cache_entry(self):
+        for boundary in ('a', 'b', 'c'):
+            self.client.get(self.url, content_type=f'multipart/form-data; boundary={boundary}')
+        self.assertEqual(len(CustomContentNegotiation.cache.data), 1)
+
+    def test_unacceptable_accept_is_not_cached(self):
+        resp = self.client.get(self.url, HTTP_ACCEPT='image/gif')
+        self.assertEqual(resp.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+        self.assertEqual(len(CustomContentNegotiation.cache.data), 0)
+
+
+class LRUCacheTests(APITestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
@@ -0,0 +1,32 @@
+from collections import OrderedDict
+from decimal import Decimal
+from django.utils.xmlutils import UnserializableContentError
+from rest_framework.test import APITestCase
+from rest_framework_xml.renderers import XMLRenderer
+from wookie.renderers import FastXMLRenderer
+
+
+class FastXMLRendererTests(APITestCase):
+    def setUp(self):
+        self.data = [
+            OrderedDict([('id', 1), ('title', 'Wookiee <Tales> & "Songs"'), ('author_pseudonym', 'Lohgarra'),
+                         ('cover_image', None), ('price', '12.30'), ('published', True)]),
+            {'id': 2, 'title': '', 'tags': ['a', 'b'], 'meta': {'rating': Decimal('4.5'), 'ratio': 0.25},
+             'published': False, 'empty': [], 'unicode': 'Kashyyyk – ☕'},
+        ]
+
+    def test_render_matches_xml_renderer(self):
+        for data in [self.data, self.data[0], 'ok', '', 42, [], {}]:
+            self.assertEqual(FastXMLRenderer().render(data), XMLRenderer().render(data))
+
+    def test_render_none_is_empty(self):
+        self.assertEqual(FastXMLRenderer().render(None), XMLRenderer().render(None))
+
+    def test_render_stream_matches_xml_renderer(self):
+        self.assertEqual(''.join(FastXMLRenderer().render_stream(iter(self.data))), XMLRenderer().render(self.data))
+        self.assertEqual(''.join(FastXMLRenderer().render_stream(iter([]))), XMLRenderer().render([]))
+
+    def test_render_raises_on_control_characters(self):
+        data = {'title': 'bell \x07'}
+        self.assertRaises(UnserializableContentError, XMLRenderer().render, data)
+        self.assertRaises(UnserializableContentError, FastXMLRenderer().render, data)
@@ -7,7 +7,8 @@ from wookie.negotiation import CustomContentNegotiation
 
 header_param = openapi.Parameter('Content-Type', openapi.IN_HEADER,
                                  description="Content-Type of header param.\n"
-                                             "Use `application/xml` for xml response "
+                                             "Use `application/xml` for xml response, "
+                                             "`application/msgpack` for MessagePack response "
                                              "or `application/json` for json response.",
                                  type=openapi.IN_HEADER)
 
@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wookie.settings')
 
-application = get_asgi_application()
+# Same as `django.core.asgi.get_asgi_application()`, with a handler that can stream querysets.
+django.setup(set_prefix=False)
+
+from wookie.handlers import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
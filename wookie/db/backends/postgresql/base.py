@@ -0,0 +1,75 @@
+"""
+The PostgreSQL backend, with connections checked out of a per-process `ConnectionPool` instead
+of opened for every request. Closing a connection returns it to the pool, so the backend is
+meant to run with CONN_MAX_AGE = 0. Pool options go in OPTIONS['pool']:
+
+    'OPTIONS': {'pool': {'max_size': 10, 'timeout': 10, 'max_lifetime': 3600}}
+
+With CONN_HEALTH_CHECKS, an idle connection is pinged before it is handed out again.
+"""
+from django.db.backends.postgresql import base, creation
+from django.utils.asyncio import async_unsafe
+from psycopg2 import extensions
+
+from wookie.db.pool import PoolTimeout, close_pools, get_pool
+
+Database = base.Database
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def destroy_test_db(self, *args, **kwargs):
+        # Idle pooled connections to the test database would make dropping it fail.
+        self.connection.close()
+        close_pools()
+        return super().destroy_test_db(*args, **kwargs)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_pool(self, conn_params):
+        # Test databases and the maintenance database have their own pools.
+        key = (self.alias, repr(sorted(conn_params.items())))
+        return get_pool(key, database=self.alias, **self.settings_dict['OPTIONS'].get('pool', {}))
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        check = self.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+        self.pool = self.get_pool(conn_params)
+        try:
+            connection = self.pool.getconn(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params), check)
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc)) from exc
+        # Set by the base class for new connections only.
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        return connection
+
+    def check_connection(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection, discard = self.connection, False
+        status = connection.info.transaction_status if not connection.closed else None
+        if status in (extensions.TRANSACTION_STATUS_INTRANS, extensions.TRANSACTION_STATUS_INERROR):
+            # Closed inside a transaction: nothing of it may leak to the next borrower.
+            try:
+                connection.rollback()
+            except Database.Error:
+                discard = True
+        elif status != extensions.TRANSACTION_STATUS_IDLE:
+            discard = True
+        with self.wrap_database_errors:
+            self.pool.putconn(connection, discard=discard)
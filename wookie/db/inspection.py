@@ -0,0 +1,111 @@
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# The observers of the queries run in this context, called with the SQL and duration of each;
+# copied into the threads running the sync code of a request, ORM calls included.
+query_observers = ContextVar('query_observers', default=())
+
+
+def observe_query(execute, sql, params, many, context):
+    """
+    The one execute wrapper of every connection, handing the queries to `query_observers`.
+    """
+    if not (observers := query_observers.get()):
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = perf_counter() - start
+        for observer in observers:
+            observer(sql, duration)
+
+
+@receiver(connection_created)
+def instrument_connection(connection, **kwargs):
+    # Connections are per thread and reopened on the same wrapper, which keeps its wrappers.
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
+
+
+@contextmanager
+def observe_queries(observer):
+    """
+    Call `observer(sql, duration)` for every query run on any database inside the block, from
+    whichever thread runs it for this context.
+    """
+    # Connections opened before this module was imported; later ones go through
+    # `instrument_connection`.
+    for connection in connections.all(initialized_only=True):
+        instrument_connection(connection)
+    token = query_observers.set((*query_observers.get(), observer))
+    try:
+        yield
+    finally:
+        query_observers.reset(token)
+
+
+class QueryInspector:
+    """
+    Query observer timing every query and counting how often each query shape runs.
+
+    Django sends the parameters apart from the SQL, so the SQL of a query is its shape: the
+    same shape run over and over in one request is the N+1 pattern, e.g. reading `book.author`
+    for every book of a page.
+    """
+
+    def __init__(self, slow_threshold=None, repeated_threshold=None):
+        self.slow_threshold = settings.DATABASE_SLOW_QUERY_THRESHOLD if slow_threshold is None else slow_threshold
+        self.repeated_threshold = (settings.DATABASE_REPEATED_QUERY_THRESHOLD if repeated_threshold is None
+                                   else repeated_threshold)
+        self.shapes = Counter()
+        self.slow = []
+
+    def __call__(self, sql, duration):
+        self.shapes[sql] += 1
+        if duration >= self.slow_threshold:
+            self.slow.append((sql, duration))
+
+    @property
+    def repeated(self):
+        return [(sql, count) for sql, count in self.shapes.items() if count >= self.repeated_threshold]
+
+    def log(self, origin):
+        for sql, duration in self.slow:
+            logger.warning('Slow query (%.1f ms) in %s: %s', duration * 1000, origin, sql)
+        for sql, count in self.repeated:
+            logger.warning('Query run %d times in %s: %s', count, origin, sql)
+
+
+@contextmanager
+def inspect_queries(slow_threshold=None, repeated_threshold=None):
+    """
+    Inspect every query run on any database inside the block.
+    """
+    inspector = QueryInspector(slow_threshold, repeated_threshold)
+    with observe_queries(inspector):
+        yield inspector
+
+
+@contextmanager
+def assert_no_repeated_queries(threshold=2):
+    """
+    Fail when the block runs the same query shape `threshold` times or more, for tests::
+
+        with assert_no_repeated_queries():
+            self.client.get(reverse('book-list'))
+    """
+    with inspect_queries(slow_threshold=float('inf'), repeated_threshold=threshold) as inspector:
+        yield inspector
+    if repeated := inspector.repeated:
+        raise AssertionError('Repeated queries:\n' + '\n'.join(f'{count}x {sql}' for sql, count in repeated))
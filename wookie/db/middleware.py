@@ -0,0 +1,133 @@
+import hashlib
+import random
+from asyncio import iscoroutinefunction
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.utils.decorators import sync_and_async_middleware
+
+from wookie.db.inspection import inspect_queries, observe_queries
+from wookie.db.routers import read_from_replicas
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@sync_and_async_middleware
+def ReplicaMiddleware(get_response):
+    """
+    Let the reads of safe requests go to the replicas, unless the client wrote something in the
+    last DATABASE_PRIMARY_PIN_TIMEOUT seconds: it then reads from the primary, and sees its own
+    writes, until the replicas have surely caught up. Clients are told apart by their
+    credentials; `request.db_pinned` tells whether this one is pinned.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            key = get_pin_key(request)
+            request.db_pinned = bool(key and request.method in SAFE_METHODS and await cache.aget(key))
+            set_read_from_replicas(request)
+            response = await get_response(request)
+            if key and should_pin(request, response):
+                await cache.aset(key, True, settings.DATABASE_PRIMARY_PIN_TIMEOUT)
+            return response
+    else:
+        def middleware(request):
+            key = get_pin_key(request)
+            request.db_pinned = bool(key and request.method in SAFE_METHODS and cache.get(key))
+            set_read_from_replicas(request)
+            response = get_response(request)
+            if key and should_pin(request, response):
+                cache.set(key, True, settings.DATABASE_PRIMARY_PIN_TIMEOUT)
+            return response
+    return middleware
+
+
+def get_pin_key(request):
+    if not settings.DATABASE_REPLICAS:
+        return None
+    credentials = request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    return f'db:primary-pin:{hashlib.md5(credentials.encode()).hexdigest()}'
+
+
+def set_read_from_replicas(request):
+    # Kept for the rest of the request, streamed response bodies included, and cleared once
+    # the response is closed.
+    read_from_replicas.set(request.method in SAFE_METHODS and not request.db_pinned)
+
+
+def should_pin(request, response):
+    return request.method not in SAFE_METHODS and response.status_code < 400
+
+
+def reset_read_from_replicas(**kwargs):
+    read_from_replicas.set(False)
+
+
+request_finished.connect(reset_read_from_replicas)
+
+
+@sync_and_async_middleware
+def QueryCountMiddleware(get_response):
+    """
+    Send the number of database queries run for a request in an `X-Query-Count` header, read by
+    `benchmarks.load`. The queries of a streamed body run after the header is sent and are not
+    counted.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with count_queries() as queries:
+                response = await get_response(request)
+            response.headers['X-Query-Count'] = str(len(queries))
+            return response
+    else:
+        def middleware(request):
+            with count_queries() as queries:
+                response = get_response(request)
+            response.headers['X-Query-Count'] = str(len(queries))
+            return response
+    return middleware
+
+
+@sync_and_async_middleware
+def QueryInspectionMiddleware(get_response):
+    """
+    Inspect the queries of a DATABASE_QUERY_SAMPLE_RATE share of the requests, logging the ones
+    slower than DATABASE_SLOW_QUERY_THRESHOLD seconds and the shapes run
+    DATABASE_REPEATED_QUERY_THRESHOLD times or more (N+1 patterns) with the view that ran them.
+    Requests left out only cost a random number.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if random.random() >= settings.DATABASE_QUERY_SAMPLE_RATE:
+                return await get_response(request)
+            with inspect_queries() as inspector:
+                response = await get_response(request)
+            inspector.log(get_origin(request))
+            return response
+    else:
+        def middleware(request):
+            if random.random() >= settings.DATABASE_QUERY_SAMPLE_RATE:
+                return get_response(request)
+            with inspect_queries() as inspector:
+                response = get_response(request)
+            inspector.log(get_origin(request))
+            return response
+    return middleware
+
+
+def get_origin(request):
+    match = request.resolver_match
+    return f'{request.method} {match.view_name if match else request.path}'
+
+
+@contextmanager
+def count_queries():
+    """
+    Collect the SQL of every query run on any database inside the block.
+    """
+    queries = []
+    with observe_queries(lambda sql, duration: queries.append(sql)):
+        yield queries
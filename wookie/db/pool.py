@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Recorded as the pools change rather than read from them on a scrape, so that with
+# PROMETHEUS_MULTIPROC_DIR set (see `wookie/metrics.py`) a scrape sums up every worker.
+POOL_WAIT = Histogram(
+    'wookie_db_pool_wait_seconds', 'Time spent waiting for a free pooled connection.', ['database'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30))
+POOL_TIMEOUTS = Counter(
+    'wookie_db_pool_timeouts', 'Waits for a pooled connection that timed out.', ['database'])
+POOL_IN_USE = Gauge(
+    'wookie_db_pool_connections_in_use', 'Pooled connections checked out.', ['database'],
+    multiprocess_mode='livesum')
+POOL_IDLE = Gauge(
+    'wookie_db_pool_connections_idle', 'Pooled connections open and free.', ['database'],
+    multiprocess_mode='livesum')
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of at most `max_size` database connections shared by the threads of a
+    process. `getconn()` blocks up to `timeout` seconds for a free slot, hands out the most
+    recently returned idle connection (so a few hot connections serve a quiet process) and only
+    opens a new one with `connect()` when none is idle. Connections older than `max_lifetime`
+    seconds are closed when they come back instead of being reused.
+
+    The time spent waiting for a slot is recorded and reported by `get_stats()`, and exported
+    with the connection counts to Prometheus labelled with the pool's `database`.
+    """
+
+    def __init__(self, max_size=10, timeout=10, max_lifetime=60 * 60, database='default'):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.idle = deque()
+        # Every open connection, checked out or idle, mapped to the time it was opened.
+        self.opened_at = {}
+        self.requests = 0
+        self.timeouts = 0
+        self.connections = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.wait_metric = POOL_WAIT.labels(database)
+        self.timeouts_metric = POOL_TIMEOUTS.labels(database)
+        self.in_use_metric = POOL_IN_USE.labels(database)
+        self.idle_metric = POOL_IDLE.labels(database)
+
+    def getconn(self, connect, check=None):
+        """
+        Return a connection: an idle one for which `check(connection)` holds, or a new one.
+        Raise `PoolTimeout` when all `max_size` connections stay checked out for `timeout` seconds.
+        """
+        start = time.monotonic()
+        acquired = self.slots.acquire(timeout=self.timeout)
+        waited = time.monotonic() - start
+        with self.lock:
+            self.requests += 1
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+            if not acquired:
+                self.timeouts += 1
+        self.wait_metric.observe(waited)
+        if not acquired:
+            self.timeouts_metric.inc()
+            logger.warning('No database connection was free within %ss (%s in use)', self.timeout, self.max_size)
+            raise PoolTimeout(f'No database connection was free within {self.timeout}s, '
+                              f'all {self.max_size} are in use.')
+        try:
+            while True:
+                with self.lock:
+                    connection = self.idle.pop() if self.idle else None
+                if connection is None:
+                    connection = connect()
+                    with self.lock:
+                        self.opened_at[connection] = time.monotonic()
+                        self.connections += 1
+                    self.in_use_metric.inc()
+                    return connection
+                self.idle_metric.dec()
+                if check is None or check(connection):
+                    self.in_use_metric.inc()
+                    return connection
+                self.discard(connection)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def putconn(self, connection, discard=False):
+        """
+        Give a connection back. Pass `discard=True` when it is broken or in an unknown state.
+        """
+        try:
+            self.in_use_metric.dec()
+            with self.lock:
+                opened_at = self.opened_at.get(connection)
+            if discard or opened_at is None or time.monotonic() - opened_at >= self.max_lifetime:
+                self.discard(connection)
+            else:
+                with self.lock:
+                    self.idle.append(connection)
+                self.idle_metric.inc()
+        finally:
+            self.slots.release()
+
+    def discard(self, connection):
+        with self.lock:
+            self.opened_at.pop(connection, None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """
+        Close the idle connections; checked out ones are closed when they come back.
+        """
+        while True:
+            with self.lock:
+                connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                break
+            self.idle_metric.dec()
+            self.discard(connection)
+        with self.lock:
+            self.max_lifetime = 0
+
+    def get_stats(self):
+        with self.lock:
+            size, idle = len(self.opened_at), len(self.idle)
+            return {
+                'max_size': self.max_size,
+                'size': size,
+                'idle': idle,
+                'in_use': size - idle,
+                'requests': self.requests,
+                'timeouts': self.timeouts,
+                'connections': self.connections,
+                'wait_time': self.wait_time,
+                'max_wait_time': self.max_wait_time,
+            }
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(key, **options):
+    """
+    The process-wide pool stored under `key`, created with `options` on first use.
+    """
+    with pools_lock:
+        if (pool := pools.get(key)) is None:
+            pool = pools[key] = ConnectionPool(**options)
+        return pool
+
+
+def close_pools():
+    with pools_lock:
+        closing = list(pools.values())
+        pools.clear()
+    for pool in closing:
+        pool.close()
@@ -0,0 +1,96 @@
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Set by `ReplicaMiddleware` for the requests whose reads may be served by a replica.
+read_from_replicas = ContextVar('read_from_replicas', default=False)
+
+# Seconds the replica is behind the primary: 0 when it is streaming from the primary and
+# replayed everything it received, otherwise the age of the last replayed transaction (infinite
+# when there is none). A standby that lost its primary has nothing left to replay either, so
+# the receiver status is checked too. 0 when the database is not a standby at all.
+REPLICATION_LAG_SQL = """
+    SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+                     AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8,
+                              'Infinity'::float8) END
+"""
+
+
+class Replicas:
+    """
+    The replicas in DATABASE_REPLICAS that can serve reads: the ones answering and behind the
+    primary by at most DATABASE_REPLICA_MAX_LAG seconds. Checked at most once every
+    DATABASE_REPLICA_CHECK_INTERVAL seconds per process, by whichever thread comes first while
+    the others keep using the previous answer.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.available = []
+        self.checked_at = None
+
+    def get_available(self):
+        if self.checked_at is None or time.monotonic() - self.checked_at >= settings.DATABASE_REPLICA_CHECK_INTERVAL:
+            if self.lock.acquire(blocking=False):
+                try:
+                    self.available = [alias for alias in settings.DATABASE_REPLICAS
+                                      if self.is_available(alias)]
+                    self.checked_at = time.monotonic()
+                finally:
+                    self.lock.release()
+        return self.available
+
+    def is_available(self, alias):
+        lag = self.get_lag(alias)
+        if lag is None or lag > settings.DATABASE_REPLICA_MAX_LAG:
+            logger.warning('Not reading from replica %s: %s', alias,
+                           'unreachable' if lag is None else f'{lag:.1f}s behind the primary')
+            return False
+        return True
+
+    def get_lag(self, alias):
+        connection = connections[alias]
+        try:
+            if connection.vendor != 'postgresql':
+                return 0
+            with connection.cursor() as cursor:
+                cursor.execute(REPLICATION_LAG_SQL)
+                lag = cursor.fetchone()[0]
+        except DatabaseError:
+            return None
+        return float(lag or 0)
+
+
+replicas = Replicas()
+
+
+class ReplicaRouter:
+    """
+    Send the reads of safe requests to a random available replica, and everything else (writes,
+    reads of unsafe requests, of clients pinned after a write and of code outside requests) to
+    the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if read_from_replicas.get() and (available := replicas.get_available()):
+            return random.choice(available)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
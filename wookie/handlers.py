@@ -0,0 +1,50 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """
+    Django's ASGI handler, except that streaming responses are iterated in the request's
+    worker thread instead of on the event loop.
+
+    Django 4.1 consumes `StreamingHttpResponse` iterators synchronously inside the event
+    loop, so a body produced by a lazy queryset (`?stream=true`, the book export) fails with
+    `SynchronousOnlyOperation` and would block the loop anyway. Parts are pulled in batches
+    of `stream_batch_size` to keep thread hops off the per-row path.
+    """
+    stream_batch_size = 100
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': self.get_response_headers(response),
+        })
+        # Access `__iter__` and not `streaming_content` directly in case it has been overridden
+        # in a subclass, like Django does.
+        parts = iter(response)
+        next_batch = sync_to_async(lambda: list(islice(parts, self.stream_batch_size)), thread_sensitive=True)
+        while batch := await next_batch():
+            for part in batch:
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+    def get_response_headers(self, response):
+        # Same as `ASGIHandler.send_response`: header case is preserved and cookies are added.
+        headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            headers.append((bytes(header), bytes(value)))
+        for cookie in response.cookies.values():
+            headers.append((b'Set-Cookie', cookie.output(header='').encode('ascii').strip()))
+        return headers
@@ -0,0 +1,158 @@
+"""
+Prometheus metrics of the requests served by this process, scraped from `/metrics/`.
+
+Under gunicorn every worker is a process of its own: with PROMETHEUS_MULTIPROC_DIR set, each
+one writes its samples to files in that directory and the endpoint sums them up, whichever
+worker serves the scrape (see `gunicorn.conf.py`).
+"""
+import asyncio
+import hmac
+import os
+from asyncio import iscoroutinefunction
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from time import perf_counter
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+from wookie.db.inspection import observe_queries
+
+# Anything else is counted as `OTHER`, so made up methods cannot add label values.
+METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+REQUEST_DURATION = Histogram(
+    'wookie_request_duration_seconds', 'Time from a request entering the middleware to its response leaving it.',
+    ['method', 'route', 'status'])
+DB_QUERIES = Histogram(
+    'wookie_request_db_queries', 'Database queries run per request.',
+    ['route'], buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50, 100))
+DB_DURATION = Histogram(
+    'wookie_request_db_duration_seconds', 'Time per request spent running database queries.', ['route'])
+SERIALIZER_DURATION = Histogram(
+    'wookie_request_serializer_duration_seconds', 'Time per request spent in serializers.', ['route'])
+RENDERER_DURATION = Histogram(
+    'wookie_request_renderer_duration_seconds', 'Time per request spent rendering the response.', ['route'])
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'query_time', 'serializer_time', 'renderer_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.renderer_time = 0.0
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.query_time += duration
+
+
+# The metrics of the request being served; copied into the threads running its sync code.
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class MetricsMiddleware:
+    """
+    Observe the latency of every request, the number and duration of its database queries and
+    the time its serializers and renderer took, per route. The queries and rendering of a
+    streamed body happen after the response has left the middleware and are not counted.
+
+    A class, unlike the other middleware, as Django only takes `process_template_response`
+    hooks from middleware instances; DRF responses are rendered right after those run.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            # Marks the instance as a coroutine function, like Django's `MiddlewareMixin`.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        with observe_queries(metrics.record_query):
+            response = self.get_response(request)
+        observe(request, response, metrics, perf_counter() - start)
+        current_metrics.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        with observe_queries(metrics.record_query):
+            response = await self.get_response(request)
+        observe(request, response, metrics, perf_counter() - start)
+        current_metrics.reset(token)
+        return response
+
+    def process_template_response(self, request, response):
+        if (metrics := current_metrics.get()) is not None:
+            response.add_post_render_callback(partial(rendered, metrics, perf_counter()))
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return MetricsMiddleware.process_template_response(self, request, response)
+
+
+def observe(request, response, metrics, duration):
+    match = request.resolver_match
+    route = match.route if match else 'unmatched'
+    method = request.method if request.method in METHODS else 'OTHER'
+    REQUEST_DURATION.labels(method, route, str(response.status_code)).observe(duration)
+    DB_QUERIES.labels(route).observe(metrics.queries)
+    DB_DURATION.labels(route).observe(metrics.query_time)
+    SERIALIZER_DURATION.labels(route).observe(metrics.serializer_time)
+    RENDERER_DURATION.labels(route).observe(metrics.renderer_time)
+
+
+def rendered(metrics, start, response):
+    metrics.renderer_time += perf_counter() - start
+
+
+@contextmanager
+def time_serializer():
+    """
+    Add the time spent in the block to the serializer time of the current request.
+    """
+    if (metrics := current_metrics.get()) is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += perf_counter() - start
+
+
+def get_registry():
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """
+    The metrics in the Prometheus text format, for scrapers sending `Authorization: Bearer
+    <METRICS_TOKEN>`. Not served at all without a METRICS_TOKEN.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    expected = f'Bearer {settings.METRICS_TOKEN}'.encode()
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+        return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
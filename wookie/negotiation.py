@@ -1,16 +1,49 @@
 from rest_framework.negotiation import DefaultContentNegotiation
 
+from wookie.utils import LRUCache
 
+# Request Content-Types that pick the response format, mapped to a renderer `format`.
+# Registering a new format is one entry here plus its renderer in DEFAULT_RENDERER_CLASSES.
 CONTENT_TYPES = {
     'application/json': 'json',
-    'application/xml': 'xml'
+    'application/xml': 'xml',
+    'application/msgpack': 'msgpack',
+    'application/x-msgpack': 'msgpack',
 }
 
+NEGOTIATION_CACHE_SIZE = 1024
+
 
 class CustomContentNegotiation(DefaultContentNegotiation):
+    content_types = CONTENT_TYPES
+    cache = LRUCache(NEGOTIATION_CACHE_SIZE)
+
     def select_renderer(self, request, renderers, format_suffix=None):
-        if content_type := CONTENT_TYPES.get(request.headers.get('Content-Type')):
+        # Negotiation only depends on these headers/parameters and the renderer classes, so
+        # every distinct combination is resolved once and then served from the cache.
+        # The Content-Type is keyed without its parameters: the boundary of every multipart
+        # upload differs.
+        format_query_param = self.settings.URL_FORMAT_OVERRIDE
+        key = (
+            get_media_type(request),
+            request.headers.get('Accept'),
+            format_query_param and request.query_params.get(format_query_param),
+            format_suffix,
+            tuple(type(renderer) for renderer in renderers),
+        )
+        if (selected := self.cache.get(key)) is None:
+            renderer, media_type = self.negotiate(request, renderers, format_suffix)
+            selected = self.cache.set(key, (renderers.index(renderer), media_type))
+        index, media_type = selected
+        return renderers[index], media_type
+
+    def negotiate(self, request, renderers, format_suffix=None):
+        if content_type := self.content_types.get(get_media_type(request)):
             for renderer in self.filter_renderers(renderers, content_type):
                 if content_type == renderer.format:
                     return renderer, renderer.media_type
         return super().select_renderer(request, renderers, format_suffix)
+
+
+def get_media_type(request):
+    return request.headers.get('Content-Type', '').split(';')[0].strip().lower()
@@ -0,0 +1,67 @@
+import csv
+import json
+
+import msgpack
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack-serialized data.
+    """
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (TypeError, ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
+
+
+class LegacyMessagePackParser(MessagePackParser):
+    """
+    Parses MessagePack sent as `application/x-msgpack`, the older unregistered media type
+    still used by many clients; `LegacyMessagePackRenderer` answers in it.
+    """
+    media_type = 'application/x-msgpack'
+
+
+class JSONLinesParser(BaseParser):
+    """
+    Parses JSON lines, one JSON document per line, into a lazy iterator of documents, so a
+    large upload is read from the request as it is consumed. Blank lines are skipped.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return self.iter_documents(stream or (), encoding)
+
+    def iter_documents(self, stream, encoding):
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line.decode(encoding))
+            except ValueError as exc:
+                raise ParseError('JSON parse error on line %d - %s' % (number, str(exc)))
+
+
+class CSVParser(BaseParser):
+    """
+    Parses CSV with a header row into a lazy iterator of dicts keyed by the header.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return self.iter_rows(stream or (), encoding)
+
+    def iter_rows(self, stream, encoding):
+        lines = (line.decode(encoding) for line in stream)
+        try:
+            yield from csv.DictReader(lines)
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError('CSV parse error - %s' % str(exc))
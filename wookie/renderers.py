@@ -0,0 +1,182 @@
+import csv
+import io
+import json
+import re
+from xml.sax.saxutils import escape
+
+import msgpack
+from django.utils.encoding import force_str
+from django.utils.xmlutils import UnserializableContentError
+from rest_framework import renderers
+from rest_framework.utils import encoders
+from rest_framework_xml.renderers import XMLRenderer
+
+CONTROL_CHARACTERS_RE = re.compile(r'[\x00-\x08\x0B-\x0C\x0E-\x1F]')
+
+
+class StreamingJSONRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer that can also render a list incrementally.
+
+    `render_stream` yields the same bytes `render` produces for a list of the same items,
+    one item at a time, so the full list never has to sit in memory.
+    """
+
+    def render_stream(self, items, accepted_media_type=None, renderer_context=None):
+        yield b'['
+        separator = b''
+        for item in items:
+            yield separator + self.render(item, renderer_context=renderer_context)
+            separator = b','
+        yield b']'
+
+
+class FastXMLRenderer(XMLRenderer):
+    """
+    Drop-in replacement for `rest_framework_xml`'s `XMLRenderer`.
+
+    Produces exactly the same document, but appends string fragments to a list instead of
+    driving a SAX generator call by call, and checks for control characters once per
+    document instead of once per text node. Lists can also be rendered incrementally.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return ''
+
+        parts = [self.prolog, f'<{self.root_tag_name}>']
+        self.build(parts, data, {})
+        parts.append(f'</{self.root_tag_name}>')
+        return self.check(''.join(parts))
+
+    def render_stream(self, items, accepted_media_type=None, renderer_context=None):
+        tags = {}
+        yield self.prolog + f'<{self.root_tag_name}>'
+        for item in items:
+            parts = []
+            self.build(parts, [item], tags)
+            yield self.check(''.join(parts))
+        yield f'</{self.root_tag_name}>'
+
+    @property
+    def prolog(self):
+        return f'<?xml version="1.0" encoding="{self.charset}"?>\n'
+
+    def build(self, parts, data, tags):
+        """
+        Append the fragments of `data` to `parts`; `tags` memoizes the open/close tag pair
+        of every key seen so far.
+        """
+        if isinstance(data, (list, tuple)):
+            item_open, item_close = f'<{self.item_tag_name}>', f'</{self.item_tag_name}>'
+            for item in data:
+                parts.append(item_open)
+                self.build(parts, item, tags)
+                parts.append(item_close)
+
+        elif isinstance(data, dict):
+            for key, value in data.items():
+                if (tag := tags.get(key)) is None:
+                    tag = tags[key] = (f'<{key}>', f'</{key}>')
+                parts.append(tag[0])
+                if isinstance(value, str):
+                    parts.append(escape(value))
+                elif isinstance(value, (bool, int)):
+                    parts.append(str(value))
+                elif value is not None:
+                    self.build(parts, value, tags)
+                parts.append(tag[1])
+
+        elif data is None:
+            # Don't output any value
+            pass
+
+        else:
+            parts.append(escape(force_str(data)))
+
+    def check(self, document):
+        if CONTROL_CHARACTERS_RE.search(document):
+            # Fail like `SimplerXMLGenerator.characters` does
+            raise UnserializableContentError('Control characters are not supported in XML 1.0')
+        return document
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Renderer which serializes to MessagePack, a compact binary encoding of the JSON data model.
+    Values msgpack has no type for (dates, decimals, uuids...) are converted like the JSON
+    renderer converts them.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = encoders.JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.encoder_class().default)
+
+
+class LegacyMessagePackRenderer(MessagePackRenderer):
+    """
+    MessagePack for clients accepting `application/x-msgpack`, the older unregistered media type.
+    """
+    media_type = 'application/x-msgpack'
+
+
+class JSONLinesRenderer(renderers.BaseRenderer):
+    """
+    Renderer which serializes a list to JSON lines, one item per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = 'utf-8'
+    encoder_class = encoders.JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(self.render_stream(data if isinstance(data, list) else [data]))
+
+    def render_stream(self, items, accepted_media_type=None, renderer_context=None):
+        encoder = self.encoder_class(ensure_ascii=False, separators=(',', ':'))
+        for item in items:
+            yield (encoder.encode(item) + '\n').encode(self.charset)
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """
+    Renderer which serializes a list of flat dicts to CSV with a header row taken from the
+    keys of the first item. Nested values are written as JSON, None as an empty cell.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    encoder_class = encoders.JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(self.render_stream(data if isinstance(data, list) else [data]))
+
+    def render_stream(self, items, accepted_media_type=None, renderer_context=None):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        header = None
+        for item in items:
+            if header is None:
+                header = list(item)
+                writer.writerow(header)
+            writer.writerow([self.to_cell(item[key]) for key in header])
+            yield buffer.getvalue().encode(self.charset)
+            buffer.seek(0)
+            buffer.truncate()
+
+    def to_cell(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, cls=self.encoder_class, separators=(',', ':'))
+        return value
@@ -48,7 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'wookie.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'wookie.db.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,6 +59,21 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Bearer token Prometheus scrapes `/metrics/` with; the endpoint is not served without one
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN', '')
+
+# Share of requests whose queries are inspected: the ones slower than SQL_SLOW_QUERY_MS and the
+# query shapes run SQL_REPEATED_QUERY_THRESHOLD times or more in one request (N+1) are logged
+DATABASE_QUERY_SAMPLE_RATE = float(os.environ.get('SQL_QUERY_SAMPLE_RATE', 0))
+DATABASE_SLOW_QUERY_THRESHOLD = float(os.environ.get('SQL_SLOW_QUERY_MS', 500)) / 1000
+DATABASE_REPEATED_QUERY_THRESHOLD = int(os.environ.get('SQL_REPEATED_QUERY_THRESHOLD', 5))
+if DATABASE_QUERY_SAMPLE_RATE > 0:
+    MIDDLEWARE.insert(1, 'wookie.db.middleware.QueryInspectionMiddleware')
+
+# Report the number of queries of every request in an `X-Query-Count` header, for benchmarks
+if os.environ.get('DJANGO_QUERY_COUNT_HEADER') == 'True':
+    MIDDLEWARE.insert(0, 'wookie.db.middleware.QueryCountMiddleware')
+
 ROOT_URLCONF = 'wookie.urls'
 
 TEMPLATES = [
@@ -88,9 +105,76 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD", "password"),
         "HOST": os.environ.get("SQL_HOST", "localhost"),
         "PORT": os.environ.get("SQL_PORT", "5432"),
+        # Seconds a connection is kept open for the next requests of the same thread (0 closes it
+        # after every request), pinged before being reused when CONN_HEALTH_CHECKS is on
+        "CONN_MAX_AGE": int(os.environ.get("SQL_CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": os.environ.get("SQL_CONN_HEALTH_CHECKS", "True") != "False",
+        "OPTIONS": {},
     }
 }
 
+# 'SQL_CONN_POOL' shares connections between requests:
+# - 'internal': every process keeps a pool of up to SQL_POOL_MAX_SIZE PostgreSQL connections that
+#   requests wait SQL_POOL_TIMEOUT seconds at most for. Unlike CONN_MAX_AGE it also works under
+#   ASGI, where every request runs in a thread of its own.
+# - 'pgbouncer': connect to a PgBouncer in transaction pooling mode, which can not keep a
+#   server-side cursor open across transactions, so `?stream=true` lists read all rows at once.
+SQL_CONN_POOL = os.environ.get("SQL_CONN_POOL", "")
+if SQL_CONN_POOL == "internal":
+    DATABASES["default"].update({
+        "ENGINE": "wookie.db.backends.postgresql",
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {
+            "pool": {
+                "max_size": int(os.environ.get("SQL_POOL_MAX_SIZE", 10)),
+                "timeout": float(os.environ.get("SQL_POOL_TIMEOUT", 10)),
+                "max_lifetime": float(os.environ.get("SQL_POOL_MAX_LIFETIME", 60 * 60)),
+            },
+        },
+    })
+elif SQL_CONN_POOL == "pgbouncer":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+elif SQL_CONN_POOL:
+    raise ValueError(f"SQL_CONN_POOL must be 'internal' or 'pgbouncer', not {SQL_CONN_POOL!r}")
+
+# 'SQL_REPLICA_HOSTS' lists read replicas of the default database as space separated host[:port]
+# values. Safe requests read from one of those behind the primary by at most SQL_REPLICA_MAX_LAG
+# seconds (checked every SQL_REPLICA_CHECK_INTERVAL seconds); a client that wrote something reads
+# from the primary for the next SQL_PRIMARY_PIN_TIMEOUT seconds.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(os.environ.get("SQL_REPLICA_HOSTS", "").split(), 1):
+    host, _, port = replica.partition(":")
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "OPTIONS": {**DATABASES["default"]["OPTIONS"]},
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{number}")
+
+DATABASE_ROUTERS = ["wookie.db.routers.ReplicaRouter"]
+DATABASE_REPLICA_MAX_LAG = float(os.environ.get("SQL_REPLICA_MAX_LAG", 5))
+DATABASE_REPLICA_CHECK_INTERVAL = float(os.environ.get("SQL_REPLICA_CHECK_INTERVAL", 5))
+DATABASE_PRIMARY_PIN_TIMEOUT = int(os.environ.get("SQL_PRIMARY_PIN_TIMEOUT", 10))
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+if REDIS_URL := os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -133,12 +217,22 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'wookie.renderers.StreamingJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
-        'rest_framework_xml.renderers.XMLRenderer',
+        'wookie.renderers.FastXMLRenderer',
+        'wookie.renderers.MessagePackRenderer',
+        'wookie.renderers.LegacyMessagePackRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'wookie.parsers.MessagePackParser',
+        'wookie.parsers.LegacyMessagePackParser',
     ],
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'wookie.negotiation.CustomContentNegotiation',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'wookie.apps.author.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.DjangoModelPermissions'
@@ -150,6 +244,40 @@ REST_FRAMEWORK = {
 
 AUTH_USER_MODEL = 'author.Author'
 
+# Keyset pagination of the book list, used when a request passes `cursor` or `page_size`
+BOOK_PAGE_SIZE = int(os.environ.get('BOOK_PAGE_SIZE', 50))
+BOOK_MAX_PAGE_SIZE = int(os.environ.get('BOOK_MAX_PAGE_SIZE', 500))
+
+# `facets=true` book lists count the books per price range (split at these edges) and for the
+# BOOK_FACET_AUTHORS most frequent author pseudonyms
+BOOK_FACET_PRICE_EDGES = tuple(os.environ.get('BOOK_FACET_PRICE_EDGES', '10 25 50 100').split())
+BOOK_FACET_AUTHORS = int(os.environ.get('BOOK_FACET_AUTHORS', 10))
+
+# Rows fetched per round trip of the server-side cursor behind `?stream=true` book lists
+BOOK_STREAM_CHUNK_SIZE = int(os.environ.get('BOOK_STREAM_CHUNK_SIZE', 2000))
+
+# Seconds a serialized page of the public book list stays cached. Writes bump the catalog
+# version instead of deleting entries, so stale pages are simply never read again
+BOOK_LIST_CACHE_TIMEOUT = int(os.environ.get('BOOK_LIST_CACHE_TIMEOUT', 60 * 15))
+
+# Uploaded covers are verified and re-encoded to WebP, with thumbnails fitting each size box,
+# by a pool of BOOK_COVER_WORKERS threads per process after the request has returned
+BOOK_COVER_WORKERS = int(os.environ.get('BOOK_COVER_WORKERS', 2))
+BOOK_COVER_QUALITY = int(os.environ.get('BOOK_COVER_QUALITY', 80))
+BOOK_COVER_THUMBNAIL_SIZES = (128, 256, 512)
+
+# Dotted path of the full-text search backend behind `q=`; picked from the database vendor when empty
+BOOK_SEARCH_BACKEND = os.environ.get('BOOK_SEARCH_BACKEND')
+
+# Bulk imports are validated and inserted BOOK_IMPORT_BATCH_SIZE rows at a time, all in one
+# transaction; larger uploads are rejected and error reports stop after BOOK_IMPORT_MAX_ERRORS rows
+BOOK_IMPORT_BATCH_SIZE = int(os.environ.get('BOOK_IMPORT_BATCH_SIZE', 1000))
+BOOK_IMPORT_MAX_ROWS = int(os.environ.get('BOOK_IMPORT_MAX_ROWS', 100_000))
+BOOK_IMPORT_MAX_ERRORS = int(os.environ.get('BOOK_IMPORT_MAX_ERRORS', 100))
+
+# Most ids a bulk publish/unpublish/delete request may list; filters are not capped
+BOOK_BULK_MAX_IDS = int(os.environ.get('BOOK_BULK_MAX_IDS', 10_000))
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': {
@@ -171,3 +299,10 @@ SIMPLE_JWT = {
     'SIGNING_KEY': JWT_SIGNING_KEY,
     'VERIFYING_KEY': JWT_VERIFYING_KEY
 }
+
+# Per-process caches of CachedJWTAuthentication: verified tokens (kept until their `exp`) and
+# the authors they resolve to (kept for JWT_USER_CACHE_TIMEOUT seconds, or until the author is saved in
+# any worker: the shared cache holds a version per author)
+JWT_TOKEN_CACHE_SIZE = int(os.environ.get('JWT_TOKEN_CACHE_SIZE', 10000))
+JWT_USER_CACHE_SIZE = int(os.environ.get('JWT_USER_CACHE_SIZE', 10000))
+JWT_USER_CACHE_TIMEOUT = int(os.environ.get('JWT_USER_CACHE_TIMEOUT', 60))
@@ -24,6 +24,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from wookie.metrics import metrics_view
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Wookie API",
@@ -42,4 +44,5 @@ urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+    path('metrics/', metrics_view, name='metrics'),
 ]